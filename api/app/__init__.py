@@ -3,15 +3,22 @@ from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from .config import Config
+# Registers the "sqlite" storage scheme used for shared rate limit counters
+from . import rate_limit_storage
 
 # Initialize limiter with default limits
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://",
+    storage_uri=Config.RATELIMIT_STORAGE_URI,
+    strategy=Config.RATELIMIT_STRATEGY,
 )
 
 def create_app():
+    # Log through a background queue before anything else logs
+    from .logging_config import configure_logging
+    configure_logging()
+
     app = Flask(__name__)
     
     # Configure CORS to allow requests from any origin in development
@@ -22,15 +29,39 @@ def create_app():
 
     # Initialize limiter with the Flask app
     limiter.init_app(app)
+
+    # Record route and upstream latency, served on /api/metrics
+    from . import metrics
+    metrics.init_app(app, limiter)
     
     # Register error handler for rate limiting
     @app.errorhandler(429)
     def ratelimit_handler(e):
-        return jsonify({
+        # RateLimitExceeded carries the limit that was hit; its window bounds the wait
+        limit = getattr(e, "limit", None)
+        retry_after = limit.limit.get_expiry() if limit is not None else 60
+        response = jsonify({
             "error": "Rate limit exceeded",
             "message": str(e.description),
-            "retry_after": e.headers.get('Retry-After', 60)
-        }), 429
+            "retry_after": retry_after
+        })
+        response.status_code = 429
+        response.headers["Retry-After"] = str(retry_after)
+        return response
+
+    # Shed by admission control while an upstream is saturated
+    from .admission import Overloaded
+
+    @app.errorhandler(Overloaded)
+    def overloaded_handler(e):
+        response = jsonify({
+            "error": "Service overloaded",
+            "message": str(e),
+            "retry_after": e.retry_after
+        })
+        response.status_code = 503
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response
 
     # Register blueprints
     from .routes import main as main_blueprint
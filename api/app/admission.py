@@ -0,0 +1,161 @@
+"""
+Admission control for calls to the upstream services (HF Space, Supabase, OpenAI).
+
+Each worker allows a bounded number of concurrent calls per upstream, with a
+short priority queue in front. A request that finds the queue full, or waits
+longer than ADMISSION_MAX_WAIT, is shed with a 503 and Retry-After instead of
+tying up a thread indefinitely on a slow upstream. Waiting requests still hold
+their threads, so threads stay free for /api/health only when the limits and
+queue sizes together are below the worker's thread count (see Config).
+Cached responses never reach a gate and keep being served while an upstream
+is slow.
+
+Gates are entered by track_upstream with the priority of the current route.
+Calls made outside a request (the scheduler, stats flushes) are never gated.
+"""
+
+import heapq
+import itertools
+import threading
+from collections import defaultdict
+
+from flask import has_request_context, request
+
+from .config import Config
+
+HIGH, NORMAL, LOW = 0, 1, 2
+PRIORITY_NAMES = {HIGH: "high", NORMAL: "normal", LOW: "low"}
+
+# Routes a player can't do without go first; hints and stats can be retried
+ROUTE_PRIORITIES = {
+    "/api/health": HIGH,
+    "/api/daily-puzzle": HIGH,
+    "/api/get-hint": LOW,
+    "/api/puzzle-stats/<puzzle_id>": LOW,
+    "/api/puzzles": LOW,
+    "/api/puzzles/<puzzle_id>": LOW,
+}
+
+class Overloaded(Exception):
+    """Raised when a request is shed; rendered as a 503 with Retry-After"""
+
+    def __init__(self, service, retry_after):
+        super().__init__(f"Too many requests waiting on {service}")
+        self.service = service
+        self.retry_after = retry_after
+
+class _Waiter:
+    __slots__ = ("priority", "event", "admitted", "evicted")
+
+    def __init__(self, priority):
+        self.priority = priority
+        self.event = threading.Event()
+        self.admitted = False
+        self.evicted = False
+
+class AdmissionGate:
+    """
+    At most `limit` concurrent calls, plus up to `queue_size` waiting ones served
+    highest priority first. The last `reserved` slots are kept for HIGH priority,
+    and a HIGH request arriving at a full queue evicts the newest lowest-priority waiter.
+    """
+
+    def __init__(self, service, limit, queue_size, max_wait, reserved=1):
+        self.service = service
+        self.limit = max(limit, 1)
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.reserved = min(reserved, self.limit - 1)
+        self.in_flight = 0
+        self.admitted = 0
+        # (priority name, reason) -> requests shed
+        self.shed = defaultdict(int)
+        # Heap of (priority, arrival, waiter)
+        self._queue = []
+        self._arrivals = itertools.count()
+        self._lock = threading.Lock()
+
+    def _has_slot(self, priority):
+        limit = self.limit if priority == HIGH else self.limit - self.reserved
+        return self.in_flight < limit
+
+    def _shed(self, priority, reason):
+        self.shed[(PRIORITY_NAMES[priority], reason)] += 1
+        return Overloaded(self.service, Config.ADMISSION_RETRY_AFTER)
+
+    def queue_depth(self):
+        return len(self._queue)
+
+    def acquire(self, priority=NORMAL):
+        """Take a slot, waiting up to max_wait in the queue; raises Overloaded when shed"""
+        with self._lock:
+            ahead = self._queue and self._queue[0][0] <= priority
+            if not ahead and self._has_slot(priority):
+                self.in_flight += 1
+                self.admitted += 1
+                return
+
+            if len(self._queue) >= self.queue_size:
+                newest_lowest = max(self._queue, default=None)
+                if newest_lowest is None or newest_lowest[0] <= priority:
+                    raise self._shed(priority, "queue_full")
+                self._queue.remove(newest_lowest)
+                heapq.heapify(self._queue)
+                evicted = newest_lowest[2]
+                evicted.evicted = True
+                evicted.event.set()
+
+            waiter = _Waiter(priority)
+            entry = (priority, next(self._arrivals), waiter)
+            heapq.heappush(self._queue, entry)
+
+        waiter.event.wait(self.max_wait)
+
+        with self._lock:
+            if waiter.admitted:
+                return
+            if waiter.evicted:
+                raise self._shed(priority, "evicted")
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+            raise self._shed(priority, "timeout")
+
+    def release(self):
+        """Free a slot, handing it straight to the best waiter that may use it"""
+        with self._lock:
+            self.in_flight -= 1
+            while self._queue and self._has_slot(self._queue[0][0]):
+                _, _, waiter = heapq.heappop(self._queue)
+                self.in_flight += 1
+                self.admitted += 1
+                waiter.admitted = True
+                waiter.event.set()
+
+def parse_limits(value):
+    """Parse "service=limit,service=limit" into a dict, ignoring malformed entries"""
+    limits = {}
+    for item in (value or "").split(","):
+        service, _, limit = item.strip().partition("=")
+        try:
+            limits[service.strip()] = int(limit)
+        except ValueError:
+            continue
+    return limits
+
+# service -> AdmissionGate, for services listed in ADMISSION_LIMITS
+gates = {
+    service: AdmissionGate(service, limit, Config.ADMISSION_QUEUE_SIZE, Config.ADMISSION_MAX_WAIT)
+    for service, limit in parse_limits(Config.ADMISSION_LIMITS).items()
+    if limit > 0
+}
+
+def enter(service):
+    """Wait for a slot for a call to service from the current request; returns the gate to release, or None"""
+    if not Config.ADMISSION_ENABLED or not has_request_context():
+        return None
+    gate = gates.get(service)
+    if gate is None:
+        return None
+    rule = request.url_rule.rule if request.url_rule else None
+    gate.acquire(ROUTE_PRIORITIES.get(rule, NORMAL))
+    return gate
@@ -1,17 +1,26 @@
 import os
-from dotenv import load_dotenv
+import tempfile
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Serverless platforms (Vercel) set VERCEL; lean boot skips .env probing and the scheduler thread
+SERVERLESS = bool(os.getenv('VERCEL'))
+LEAN_BOOT = os.getenv('LEAN_BOOT', 'true' if SERVERLESS else 'false').lower() == 'true'
+
 # Try to load environment variables from root directory first, then api directory
 root_env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env')
 api_env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
 
-if os.path.exists(root_env_path):
+if LEAN_BOOT:
+    # Environment variables come from the platform, no .env files to find
+    pass
+elif os.path.exists(root_env_path):
+    from dotenv import load_dotenv
     load_dotenv(root_env_path)
     logger.info(f"Loaded environment variables from root .env file")
 elif os.path.exists(api_env_path):
+    from dotenv import load_dotenv
     load_dotenv(api_env_path)
     logger.info(f"Loaded environment variables from api .env file")
 else:
@@ -21,9 +30,87 @@ class Config:
     # Supabase configuration with defaults for development
     SUPABASE_URL = os.getenv('SUPABASE_URL', 'https://your-project.supabase.co')
     SUPABASE_KEY = os.getenv('SUPABASE_KEY', 'your-anon-key')
+    # JWT secret of the Supabase project, to verify user access tokens locally
+    # (without it each new token is checked with one call to Supabase Auth)
+    SUPABASE_JWT_SECRET = os.getenv('SUPABASE_JWT_SECRET', '')
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
     FLASK_ENV = os.getenv('FLASK_ENV', 'development')
+    LEAN_BOOT = LEAN_BOOT
     HF_SPACE_URL = os.getenv('HF_SPACE_URL', 'https://aakashpathak-connectle-huggingface.hf.space')
+    # Seconds before a call to the HF Space gives up, so a hung Space can't hold a thread forever
+    HF_TIMEOUT = float(os.getenv('HF_TIMEOUT', '10'))
+    # Optional local embedding matrix (.npy with a sidecar .vocab file) for in-process similarity
+    EMBEDDINGS_PATH = os.getenv('EMBEDDINGS_PATH', '')
+    # Word frequencies for /api/suggest ("word<TAB>frequency" lines from scripts/build_vocabulary.py)
+    VOCABULARY_PATH = os.getenv(
+        'VOCABULARY_PATH', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'vocabulary.tsv')
+    )
+    # Precomputed definitions for /api/define (written by scripts/build_definitions.py)
+    DEFINITIONS_PATH = os.getenv(
+        'DEFINITIONS_PATH', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'definitions.bin')
+    )
+    # Local SQLite replica of puzzles and the schedule, synced by the scheduler leader ('' disables)
+    REPLICA_PATH = os.getenv('REPLICA_PATH', os.path.join(tempfile.gettempdir(), 'connectle-replica.db'))
+    REPLICA_SYNC_INTERVAL = int(os.getenv('REPLICA_SYNC_INTERVAL', '300'))
+    # Older replicas are only read when Supabase is failing
+    REPLICA_MAX_AGE = int(os.getenv('REPLICA_MAX_AGE', '900'))
+    # Lock file used to elect a single scheduler process per host (defaults to the temp dir)
+    SCHEDULER_LOCK_PATH = os.getenv('SCHEDULER_LOCK_PATH', '')
+    # Set by gunicorn.conf.py: the app is preloaded in the master, so workers start the scheduler after fork
+    DEFER_SCHEDULER = os.getenv('DEFER_SCHEDULER', 'false').lower() == 'true'
+    # How long before midnight to warm tomorrow's puzzle, and how many first guesses to warm
+    WARM_UP_MINUTES = int(os.getenv('WARM_UP_MINUTES', '5'))
+    WARM_UP_NEIGHBORS = int(os.getenv('WARM_UP_NEIGHBORS', '10'))
+    # Rate limit counters live in a SQLite file shared by all workers on the host
+    RATELIMIT_STORAGE_URI = os.getenv(
+        'RATELIMIT_STORAGE_URI',
+        'sqlite:///' + os.path.join(tempfile.gettempdir(), 'connectle-ratelimit.db')
+    )
+    RATELIMIT_STRATEGY = os.getenv('RATELIMIT_STRATEGY', 'fixed-window')
+    RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'true').lower() == 'true'
+    # Directory where each worker writes its metrics snapshot for /api/metrics
+    METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'connectle-metrics'))
+    # Bearer token for /api/metrics; without one the endpoint is only served to
+    # requests from this host in development, and not at all in production
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    # Log output: 'json' lines or 'text', and per-route sampling of sub-WARNING records
+    # as "route=rate,..." (routes not listed use LOG_SAMPLE_RATE)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text' if FLASK_ENV == 'development' else 'json').lower()
+    LOG_SAMPLE_RATES = os.getenv(
+        'LOG_SAMPLE_RATES',
+        '/api/validate-word=0.05,/api/check-word=0.05,/api/check-similarity=0.05,/api/get-hint=0.2'
+    )
+    LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '1.0'))
+    # Also log each request's Server-Timing breakdown as a JSON line
+    SERVER_TIMING_LOG = os.getenv('SERVER_TIMING_LOG', 'false').lower() == 'true'
+    # Per-worker concurrent upstream calls ("service=limit"); extra requests wait in a queue of
+    # ADMISSION_QUEUE_SIZE per service for up to ADMISSION_MAX_WAIT seconds, then get a 503.
+    # Queued requests hold a thread while they wait, so /api/health is only sure to find a free
+    # thread when the limits plus the queue sizes of all services stay below GUNICORN_THREADS
+    ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'true').lower() == 'true'
+    ADMISSION_LIMITS = os.getenv('ADMISSION_LIMITS', 'hf=4,supabase=4,openai=2')
+    ADMISSION_QUEUE_SIZE = int(os.getenv('ADMISSION_QUEUE_SIZE', '8'))
+    ADMISSION_MAX_WAIT = float(os.getenv('ADMISSION_MAX_WAIT', '1.0'))
+    ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '5'))
+    # Game results are buffered per worker and written in batches
+    STATS_FLUSH_INTERVAL = float(os.getenv('STATS_FLUSH_INTERVAL', '5'))
+    STATS_FLUSH_SIZE = int(os.getenv('STATS_FLUSH_SIZE', '500'))
+    STATS_MAX_PENDING = int(os.getenv('STATS_MAX_PENDING', '20000'))
+    # Seconds a puzzle's chain length distribution is served from memory
+    DISTRIBUTION_CACHE_TTL = int(os.getenv('DISTRIBUTION_CACHE_TTL', '30'))
+    # Seconds a process serves its cached daily puzzle before checking for a rotation made elsewhere;
+    # also the shared-cache lifetime of /api/daily-puzzle
+    DAILY_PUZZLE_TTL = int(os.getenv('DAILY_PUZZLE_TTL', '60'))
+    # Warm cache snapshot written periodically and loaded on boot; the optional bundle is a
+    # read-only snapshot shipped with the deployment, used when the local one is missing or stale
+    CACHE_SNAPSHOT_PATH = os.getenv(
+        'CACHE_SNAPSHOT_PATH', os.path.join(tempfile.gettempdir(), 'connectle-cache-snapshot.json.gz')
+    )
+    CACHE_SNAPSHOT_BUNDLE = os.getenv('CACHE_SNAPSHOT_BUNDLE', '')
+    CACHE_SNAPSHOT_INTERVAL = int(os.getenv('CACHE_SNAPSHOT_INTERVAL', '300'))
+    CACHE_SNAPSHOT_MAX_ENTRIES = int(os.getenv('CACHE_SNAPSHOT_MAX_ENTRIES', '2000'))
+    CACHE_SNAPSHOT_MAX_AGE_HOURS = int(os.getenv('CACHE_SNAPSHOT_MAX_AGE_HOURS', '24'))
     
     @classmethod
     def is_development(cls):
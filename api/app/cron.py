@@ -7,21 +7,82 @@ import logging
 import random
 import os
 import sys
+import tempfile
 import threading
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 # Import Supabase config
-from app.models.supabase_config import init_supabase
+from app.models.supabase_config import get_client, get_scheduled_puzzle, clear_schedule_cache, sync_replica, PUZZLES_TABLE
 from app.config import Config
-from supabase import create_client
+from app.metrics import track_upstream, register_collector
+
+# Number of recent puzzles the daily puzzle is chosen from
+ROTATION_CANDIDATE_LIMIT = 100
+
+# Job name used to claim the daily rotation in the scheduler_runs table
+ROTATION_JOB = "rotate_daily_puzzle"
+
+# Error codes meaning a function or table isn't deployed: PostgREST's "not found in the
+# schema cache" for functions and tables, and Postgres' undefined function and table
+MISSING_OBJECT_CODES = {"PGRST202", "PGRST205", "42883", "42P01", "404"}
+
+# Tries at claiming the rotation before skipping it, and seconds between them
+CLAIM_ATTEMPTS = 3
+CLAIM_RETRY_SECONDS = 5
+
+# Open lock file held by the scheduler leader for the life of the process
+_leader_lock_file = None
+
+# Callbacks run in every process after the daily puzzle changes
+_rotation_listeners = []
+
+# Result of the most recent pre-rollover warm-up in this process
+last_warm_up = {}
+
+def is_missing_object(error):
+    """True if a Supabase call failed because the function or table it uses doesn't exist"""
+    return str(getattr(error, "code", "")) in MISSING_OBJECT_CODES
+
+def rotate_daily_puzzle(supabase):
+    """
+    Pick a new daily puzzle and swap the is_daily flag atomically.
+    Backed by the rotate_daily_puzzle stored procedure, so this is one round trip.
+    Returns the new daily puzzle row, or None if there was nothing to rotate to.
+    """
+    with track_upstream("supabase", "rotate_daily_puzzle"):
+        response = supabase.rpc("rotate_daily_puzzle", {"candidate_limit": ROTATION_CANDIDATE_LIMIT}).execute()
+    return response.data[0] if response.data else None
+
+def rotate_daily_puzzle_multi_step(supabase):
+    """
+    Fallback rotation for databases without the rotate_daily_puzzle procedure.
+    Uses separate reset and set updates, so there is a short window with no daily puzzle.
+    """
+    # Get current daily puzzle first
+    current_daily_response = supabase.table(PUZZLES_TABLE).select("id").eq("is_daily", True).execute()
+    current_ids = {p['id'] for p in current_daily_response.data or []}
+    
+    # Get recent puzzles, excluding the current daily puzzle
+    response = supabase.table(PUZZLES_TABLE).select("id, start_word, end_word") \
+        .order("created_at", desc=True).limit(ROTATION_CANDIDATE_LIMIT).execute()
+    puzzles = [p for p in response.data or [] if p['id'] not in current_ids]
+    
+    if not puzzles:
+        logger.error("No other puzzles available to set as daily")
+        return None
+    
+    # Select a random puzzle
+    random.seed(datetime.now().timestamp())
+    selected_puzzle = random.choice(puzzles)
+    puzzle_id = selected_puzzle['id']
+    
+    # Reset all daily puzzles, then set the selected puzzle as daily
+    supabase.table(PUZZLES_TABLE).update({"is_daily": False}).eq("is_daily", True).execute()
+    supabase.table(PUZZLES_TABLE).update({"is_daily": True}).eq("id", puzzle_id).execute()
+    return selected_puzzle
 
 def set_random_daily_puzzle():
     """
@@ -31,73 +92,26 @@ def set_random_daily_puzzle():
     try:
         logger.info("Starting set_random_daily_puzzle function")
         
-        # Initialize Supabase client
-        logger.info("Initializing Supabase client")
-        if not init_supabase():
+        supabase = get_client()
+        if not supabase:
             logger.error("Failed to initialize Supabase client")
             return False
         
-        # Create Supabase client
-        logger.info(f"Creating Supabase client with URL: {Config.SUPABASE_URL[:15]}...")
-        supabase = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
-        
-        # Get current daily puzzle first
-        logger.info("Checking current daily puzzle")
-        current_daily_response = supabase.table("puzzles").select("*").eq("is_daily", True).execute()
-        current_daily = current_daily_response.data[0] if current_daily_response.data else None
+        try:
+            selected_puzzle = rotate_daily_puzzle(supabase)
+        except Exception as e:
+            # Other errors (timeouts, 5xx) may come after the function committed, and the
+            # multi-step fallback would then rotate a second time
+            if not is_missing_object(e):
+                raise
+            logger.warning(f"rotate_daily_puzzle function not found ({str(e)}), falling back to multi-step rotation")
+            selected_puzzle = rotate_daily_puzzle_multi_step(supabase)
         
-        if current_daily:
-            logger.info(f"Current daily puzzle: {current_daily['start_word']} -> {current_daily['end_word']} (ID: {current_daily['id']})")
-        else:
-            logger.info("No current daily puzzle found")
-        
-        # Get all puzzles
-        logger.info("Fetching puzzles from database")
-        response = supabase.table("puzzles").select("*").order("created_at", desc=True).limit(100).execute()
-        puzzles = response.data
-        
-        if not puzzles:
-            logger.error("No puzzles found in database")
+        if not selected_puzzle:
+            logger.error("No puzzle available to set as daily")
             return False
         
-        logger.info(f"Found {len(puzzles)} puzzles in database")
-        
-        # Filter out the current daily puzzle to ensure we select a different one
-        if current_daily:
-            puzzles = [p for p in puzzles if p['id'] != current_daily['id']]
-            logger.info(f"Filtered out current daily puzzle, {len(puzzles)} puzzles remaining")
-            
-            if not puzzles:
-                logger.error("No other puzzles available after filtering")
-                return False
-        
-        # Select a random puzzle
-        logger.info("Selecting a random puzzle")
-        random.seed(datetime.now().timestamp())
-        selected_puzzle = random.choice(puzzles)
-        logger.info(f"Selected random puzzle: {selected_puzzle['start_word']} -> {selected_puzzle['end_word']}")
-        
-        # Verify the puzzle exists
-        puzzle_id = selected_puzzle['id']
-        logger.info(f"Verifying puzzle with ID {puzzle_id}")
-        verify_response = supabase.table("puzzles").select("*").eq("id", puzzle_id).execute()
-        if not verify_response.data:
-            logger.error(f"Failed to verify puzzle with ID {puzzle_id}")
-            return False
-        
-        logger.info(f"Found puzzle: {selected_puzzle['start_word']} -> {selected_puzzle['end_word']}")
-        
-        # Reset all daily puzzles
-        logger.info("Resetting all daily puzzles")
-        reset_response = supabase.table("puzzles").update({"is_daily": False}).eq("is_daily", True).execute()
-        logger.info(f"Reset response: {reset_response}")
-        
-        # Set the selected puzzle as daily
-        logger.info(f"Setting puzzle {puzzle_id} as daily")
-        update_response = supabase.table("puzzles").update({"is_daily": True}).eq("id", puzzle_id).execute()
-        logger.info(f"Update response: {update_response}")
-        
-        logger.info(f"Successfully set puzzle {puzzle_id} as daily")
+        logger.info(f"Successfully set puzzle {selected_puzzle['id']} as daily: {selected_puzzle['start_word']} -> {selected_puzzle['end_word']}")
         return True
     except Exception as e:
         logger.error(f"Error setting random daily puzzle: {str(e)}")
@@ -108,7 +122,7 @@ def set_random_daily_puzzle():
 def set_random_puzzle():
     """
     Set a random puzzle as the current active puzzle.
-    This function is called by the scheduler every 2 minutes.
+    This function is called by the scheduler leader once a day at midnight.
     """
     logger.info("Scheduled task: Setting random puzzle")
     try:
@@ -117,6 +131,12 @@ def set_random_puzzle():
         
         if success:
             logger.info("Successfully set a random puzzle as daily")
+            # Refresh the local replica first so this host's readers see the new daily flag
+            try:
+                sync_replica()
+            except Exception as e:
+                logger.error(f"Failed to sync local replica after rotation: {e}")
+            invalidate_caches()
             return {"status": "success", "message": "Set a random puzzle as daily"}
         else:
             logger.error("Failed to set a random puzzle as daily")
@@ -125,36 +145,197 @@ def set_random_puzzle():
         logger.error(f"Error in daily task: {e}")
         return {"status": "error", "message": str(e)}
 
+def register_rotation_listener(callback):
+    """Register a callback to run in this process whenever the daily puzzle changes"""
+    _rotation_listeners.append(callback)
+
+def invalidate_caches():
+    """Drop this process's cached daily puzzle state after a rotation"""
+    # Schedule entries are keyed by date, so only past days are stale
+    clear_schedule_cache(before=datetime.now().date())
+    for callback in _rotation_listeners:
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Error in rotation listener {getattr(callback, '__name__', callback)}: {e}")
+
+def warm_up_next_day(day):
+    """
+    Load the puzzle scheduled for `day` and precompute its similarity and hint data
+    so the caches are already hot when it becomes current at midnight.
+    """
+    global last_warm_up
+    # Import here to avoid circular imports
+    from app.routes import game_service, save_cache_snapshot
+    
+    started = time.perf_counter()
+    stats = {"date": day.isoformat(), "puzzle_id": None}
+    try:
+        puzzle = get_scheduled_puzzle(day)
+        if puzzle:
+            stats["puzzle_id"] = puzzle.get("id")
+            stats.update(game_service.warm_up(puzzle, Config.WARM_UP_NEIGHBORS))
+            # Persist the warmed results so instances started after midnight begin warm
+            save_cache_snapshot()
+        else:
+            logger.warning(f"No puzzle scheduled for {day}, skipping warm-up")
+    except Exception as e:
+        logger.error(f"Error warming up puzzle for {day}: {e}")
+    
+    stats["duration_seconds"] = round(time.perf_counter() - started, 3)
+    last_warm_up = stats
+    logger.info(f"Warm-up for {day} finished: {stats}")
+    return stats
+
+def _warm_up_samples():
+    """Expose the last warm-up's duration and item counts as metrics"""
+    if not last_warm_up:
+        return []
+    samples = [("connectle_warm_up_duration_seconds", (), last_warm_up.get("duration_seconds", 0), "gauge_max")]
+    for kind in ("target_vectors", "neighbors", "similarities", "hints", "errors"):
+        if kind in last_warm_up:
+            samples.append(("connectle_warm_up_items", (("kind", kind),), last_warm_up[kind], "gauge_max"))
+    return samples
+
+register_collector(_warm_up_samples, {
+    "connectle_warm_up_duration_seconds": ("gauge_max", "Duration of the last pre-rollover warm-up"),
+    "connectle_warm_up_items": ("gauge_max", "Items warmed by the last pre-rollover warm-up"),
+})
+
+def activate_daily_puzzle():
+    """Swap this process over to today's puzzle and the data staged for it"""
+    # Import here to avoid circular imports
+    from app.routes import game_service
+    
+    try:
+        game_service.get_cached_daily_puzzle()
+    except Exception as e:
+        logger.error(f"Error activating daily puzzle: {e}")
+
+def acquire_leader_lock(lock_path=None):
+    """
+    Try to become the scheduler leader on this host with a non-blocking file lock.
+    Only one gunicorn worker gets the lock; it stays held until the process exits.
+    """
+    global _leader_lock_file
+    if _leader_lock_file is not None:
+        return True
+
+    try:
+        import fcntl
+    except ImportError:
+        # No flock on this platform (e.g. Windows dev machines), so run as leader
+        return True
+
+    lock_path = lock_path or Config.SCHEDULER_LOCK_PATH or os.path.join(tempfile.gettempdir(), "connectle-scheduler.lock")
+    lock_file = open(lock_path, "a+")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    _leader_lock_file = lock_file
+    return True
+
+def claim_daily_rotation(run_date):
+    """
+    Claim the rotation for run_date in the database so only one instance per deployment rotates.
+    Returns True if this process won the claim, or if the claim function isn't deployed.
+    Other errors are retried a few times; if they persist this run is skipped rather than
+    letting every host rotate.
+    """
+    supabase = get_client()
+    if not supabase:
+        return False
+
+    for attempt in range(1, CLAIM_ATTEMPTS + 1):
+        try:
+            with track_upstream("supabase", "claim_scheduler_run"):
+                response = supabase.rpc("claim_scheduler_run", {"job_name": ROTATION_JOB, "run_date": run_date.isoformat()}).execute()
+            return bool(response.data)
+        except Exception as e:
+            if is_missing_object(e):
+                logger.warning(f"claim_scheduler_run function not found ({str(e)}), rotating without a claim")
+                return True
+            logger.warning(f"claim_scheduler_run RPC failed (attempt {attempt}/{CLAIM_ATTEMPTS}): {str(e)}")
+            if attempt < CLAIM_ATTEMPTS:
+                time.sleep(CLAIM_RETRY_SECONDS * attempt)
+
+    logger.error(f"Could not claim the rotation for {run_date}, skipping it on this instance")
+    return False
+
+def seconds_until_next_midnight(now=None):
+    """Seconds from now until the next local midnight"""
+    now = now or datetime.now()
+    next_midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (next_midnight - now).total_seconds(), next_midnight
+
 # Scheduler function to change word once at midnight
+def start_replica_sync():
+    """Start a background thread that mirrors puzzles into the local replica every REPLICA_SYNC_INTERVAL"""
+    def run_sync():
+        while True:
+            try:
+                sync_replica()
+            except Exception as e:
+                logger.error(f"Failed to sync local replica: {e}")
+            time.sleep(Config.REPLICA_SYNC_INTERVAL)
+
+    thread = threading.Thread(target=run_sync, daemon=True)
+    thread.start()
+    logger.info("Replica sync thread started")
+
 def start_scheduler():
     """
     Start a background thread that runs set_random_puzzle once at midnight each day.
+    Every process warms its own caches for tomorrow's puzzle a few minutes before midnight;
+    only the process holding the leader lock rotates, the others just invalidate their caches.
     """
+    is_leader = acquire_leader_lock()
+    if is_leader and Config.REPLICA_PATH:
+        # One process per host keeps the shared replica file current
+        start_replica_sync()
+
     def run_scheduler():
-        logger.info("Starting scheduler thread for changing word once at midnight")
+        role = "leader" if is_leader else "follower"
+        logger.info(f"Starting scheduler thread as {role} for changing word once at midnight")
         
         while True:
             try:
-                # Get current time
-                now = datetime.now()
+                seconds_until_midnight, next_midnight = seconds_until_next_midnight()
+                warm_up_lead = Config.WARM_UP_MINUTES * 60
                 
-                # Calculate time until next midnight
-                tomorrow = now.replace(hour=0, minute=0, second=0, microsecond=0)
-                if tomorrow <= now:
-                    # If it's already past midnight, set for next day
-                    tomorrow = tomorrow.replace(day=tomorrow.day + 1)
+                logger.info(f"Scheduled next puzzle update in {seconds_until_midnight:.1f} seconds (at {next_midnight.strftime('%Y-%m-%d %H:%M:%S')})")
                 
-                # Calculate seconds until midnight
-                seconds_until_midnight = (tomorrow - now).total_seconds()
+                # Sleep until shortly before midnight, then warm tomorrow's puzzle
+                if seconds_until_midnight > warm_up_lead:
+                    time.sleep(seconds_until_midnight - warm_up_lead)
+                warm_up_next_day(next_midnight.date())
                 
-                logger.info(f"Scheduled next puzzle update in {seconds_until_midnight:.1f} seconds (at {tomorrow.strftime('%Y-%m-%d %H:%M:%S')})")
+                # Sleep the rest of the way to midnight
+                remaining = (next_midnight - datetime.now()).total_seconds()
+                if remaining > 0:
+                    time.sleep(remaining)
                 
-                # Sleep until midnight
-                time.sleep(seconds_until_midnight)
+                if is_leader:
+                    # It's midnight, set a new random puzzle unless another instance already did
+                    today = datetime.now().date()
+                    if claim_daily_rotation(today):
+                        logger.info(f"It's midnight ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})! Setting new random puzzle")
+                        set_random_puzzle()
+                    else:
+                        logger.info(f"Not rotating for {today} on this instance")
+                else:
+                    # Give the leader a moment to rotate before dropping cached state
+                    time.sleep(5)
+                    invalidate_caches()
                 
-                # It's midnight, set a new random puzzle
-                logger.info(f"It's midnight ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})! Setting new random puzzle")
-                set_random_puzzle()
+                activate_daily_puzzle()
                 
                 # Sleep for a minute to avoid running multiple times
                 time.sleep(60)
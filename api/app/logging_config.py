@@ -0,0 +1,160 @@
+"""
+Logging setup for the Connectle API.
+
+Records are put on an in-memory queue by the calling thread and written to stdout
+by a background listener thread, so request threads never block on log I/O.
+Below WARNING, records logged while handling a request are sampled per route
+(LOG_SAMPLE_RATES), with one decision per request so a sampled request keeps
+all of its lines. Each record is one line: JSON by default in production,
+readable text in development. Structured fields are passed with
+``logger.info("message", extra={"fields": {...}})``.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+from .config import Config
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Records waiting for the listener; when full, new records are dropped rather than blocking
+QUEUE_SIZE = 10000
+
+_handler = None
+
+def parse_sample_rates(value):
+    """Parse "route=rate,route=rate" into a dict, ignoring malformed entries"""
+    rates = {}
+    for item in (value or "").split(","):
+        route, _, rate = item.strip().partition("=")
+        try:
+            rates[route.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line with the record's structured fields merged in"""
+
+    def format(self, record):
+        data = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        data.update(getattr(record, "fields", None) or {})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, default=str)
+
+class TextFormatter(logging.Formatter):
+    """The usual text format with structured fields appended as key=value"""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line.replace("\n", "\\n")
+
+class RouteSampler(logging.Filter):
+    """Keep a sampled fraction of sub-WARNING records per route"""
+
+    def __init__(self, rates, default_rate=1.0):
+        super().__init__()
+        self.rates = rates
+        self.default_rate = default_rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not has_request_context():
+            return True
+        sampled = g.get("log_sampled")
+        if sampled is None:
+            route = request.url_rule.rule if request.url_rule else request.path
+            rate = self.rates.get(route, self.default_rate)
+            sampled = rate >= 1.0 or random.random() < rate
+            g.log_sampled = sampled
+        return sampled
+
+class BackgroundQueueHandler(QueueHandler):
+    """QueueHandler that never blocks and starts its listener in each process (after fork)"""
+
+    def __init__(self, target):
+        super().__init__(queue.Queue(QUEUE_SIZE))
+        self.target = target
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        # A forked child inherits the queue but not the listener thread
+        self.queue = queue.Queue(QUEUE_SIZE)
+        self._listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+        self._listener.start()
+        self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Only merge the message arguments here; formatting happens on the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._pid = None
+
+def configure_logging():
+    """Install the queue-backed root handler once per process; later calls are no-ops"""
+    global _handler
+    if _handler is not None:
+        return _handler
+
+    stream = logging.StreamHandler(sys.stdout)
+    if Config.LOG_FORMAT == "json":
+        stream.setFormatter(JSONFormatter())
+    else:
+        stream.setFormatter(TextFormatter(TEXT_FORMAT))
+
+    _handler = BackgroundQueueHandler(stream)
+    _handler.addFilter(RouteSampler(parse_sample_rates(Config.LOG_SAMPLE_RATES), Config.LOG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(Config.LOG_LEVEL)
+    # Flush what is still queued on shutdown
+    atexit.register(_handler.stop)
+
+    from .metrics import register_collector
+    register_collector(
+        lambda: [("connectle_log_records_dropped_total", (), _handler.dropped, "counter")],
+        {"connectle_log_records_dropped_total": ("counter", "Log records dropped because the log queue was full")},
+    )
+    return _handler
@@ -0,0 +1,429 @@
+"""
+In-process metrics for the Connectle API, exposed on /api/metrics in Prometheus text format.
+
+Each worker records into plain dicts (no locks on the hot path) and periodically
+writes a snapshot to METRICS_DIR. A scrape of any worker merges every worker's
+snapshot, so the numbers cover the whole gunicorn deployment on the host.
+Snapshots of exited workers are folded into one retired file and deleted, so
+their counters still count but a new worker reusing the pid starts clean.
+
+The endpoint is served only to callers with METRICS_TOKEN as a bearer token.
+Outside development it is refused entirely when no token is configured, since
+behind a reverse proxy on the same host every request looks local; in
+development, requests from this host may scrape without one.
+"""
+
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from flask import Response, g, has_request_context, jsonify, request
+
+from . import admission
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds between snapshot writes from each worker
+FLUSH_INTERVAL = 15
+
+# Counters and histograms of exited workers, in METRICS_DIR
+RETIRED_FILE = "retired.json"
+
+LOCAL_ADDRESSES = ("127.0.0.1", "::1")
+
+# Server-Timing span name per upstream service
+SPAN_NAMES = {"hf": "hf", "supabase": "db", "openai": "llm"}
+
+REQUEST_DURATION = "connectle_request_duration_seconds"
+RESPONSES = "connectle_responses_total"
+UPSTREAM_DURATION = "connectle_upstream_duration_seconds"
+UPSTREAM_ERRORS = "connectle_upstream_errors_total"
+
+HELP = {
+    REQUEST_DURATION: ("histogram", "Request latency per route"),
+    RESPONSES: ("counter", "Responses per route and status code"),
+    UPSTREAM_DURATION: ("histogram", "Latency of calls to the HF Space, Supabase and OpenAI"),
+    UPSTREAM_ERRORS: ("counter", "Upstream calls that raised an exception"),
+    "connectle_cache_hits_total": ("counter", "Cache hits per in-process cache"),
+    "connectle_cache_misses_total": ("counter", "Cache misses per in-process cache"),
+    "connectle_cache_entries": ("gauge", "Entries currently held per in-process cache"),
+}
+
+class Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+
+# (metric name, label pairs) -> Histogram / count / value
+_histograms = {}
+_counters = defaultdict(int)
+# Callables returning [(name, labels, value, kind)] computed at snapshot time
+_collectors = []
+
+_flusher_pid = None
+
+def observe(name, labels, seconds):
+    histogram = _histograms.get((name, labels))
+    if histogram is None:
+        histogram = _histograms.setdefault((name, labels), Histogram())
+    histogram.observe(seconds)
+
+def inc(name, labels, amount=1):
+    _counters[(name, labels)] += amount
+
+def register_collector(collector, help_text=None):
+    """Register a callable that returns extra samples as [(name, labels, value, kind)]"""
+    _collectors.append(collector)
+    if help_text:
+        HELP.update(help_text)
+
+# (service, operation) -> Histogram, so timing a call is one dict lookup
+_upstream_histograms = {}
+
+class track_upstream:
+    """Context manager timing one upstream call, e.g. ``with track_upstream("hf", "hint"):``"""
+    __slots__ = ("key", "histogram", "start", "gate")
+
+    def __init__(self, service, operation):
+        self.key = (service, operation)
+        self.histogram = _upstream_histograms.get(self.key)
+        if self.histogram is None:
+            labels = (("service", service), ("operation", operation))
+            self.histogram = _histograms.setdefault((UPSTREAM_DURATION, labels), Histogram())
+            _upstream_histograms[self.key] = self.histogram
+
+    def __enter__(self):
+        # Waits for a slot for this upstream, or raises admission.Overloaded
+        self.gate = admission.enter(self.key[0])
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        if self.gate is not None:
+            self.gate.release()
+        self.histogram.observe(elapsed)
+        # Add to the current request's Server-Timing spans
+        if has_request_context():
+            spans = g.get("spans")
+            if spans is not None:
+                name = SPAN_NAMES.get(self.key[0], self.key[0])
+                spans[name] = spans.get(name, 0.0) + elapsed
+        if exc_type is not None:
+            inc(UPSTREAM_ERRORS, (("service", self.key[0]), ("operation", self.key[1])))
+        return False
+
+def _cache_samples():
+    from .services.cache import caches
+
+    samples = []
+    for name, cache in list(caches.items()):
+        labels = (("cache", name),)
+        samples.append(("connectle_cache_hits_total", labels, cache.hits, "counter"))
+        samples.append(("connectle_cache_misses_total", labels, cache.misses, "counter"))
+        samples.append(("connectle_cache_entries", labels, len(cache), "gauge"))
+    return samples
+
+register_collector(_cache_samples)
+
+def _admission_samples():
+    samples = []
+    for service, gate in list(admission.gates.items()):
+        labels = (("service", service),)
+        samples.append(("connectle_admission_in_flight", labels, gate.in_flight, "gauge"))
+        samples.append(("connectle_admission_queue_depth", labels, gate.queue_depth(), "gauge"))
+        samples.append(("connectle_admission_admitted_total", labels, gate.admitted, "counter"))
+        for (priority, reason), count in list(gate.shed.items()):
+            samples.append(("connectle_admission_shed_total",
+                            labels + (("priority", priority), ("reason", reason)), count, "counter"))
+    return samples
+
+register_collector(_admission_samples, {
+    "connectle_admission_in_flight": ("gauge", "Upstream calls holding an admission slot"),
+    "connectle_admission_queue_depth": ("gauge", "Requests waiting for an upstream admission slot"),
+    "connectle_admission_admitted_total": ("counter", "Requests admitted to call an upstream"),
+    "connectle_admission_shed_total": ("counter", "Requests shed with a 503 per upstream, priority and reason"),
+})
+
+def memory_usage(pid="self"):
+    """
+    RSS, PSS, shared and private bytes of a process from /proc/<pid>/smaps_rollup.
+    Shared pages are the ones preloaded by the gunicorn master and not yet copied
+    on write. Returns {} where smaps_rollup is unavailable (non-Linux).
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                parts = value.split()
+                if len(parts) == 2 and parts[1] == "kB":
+                    fields[name] = int(parts[0]) * 1024
+    except OSError:
+        return {}
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+def _memory_samples():
+    pid = str(os.getpid())
+    return [("connectle_process_memory_bytes", (("pid", pid), ("kind", kind)), value, "gauge")
+            for kind, value in memory_usage().items()]
+
+register_collector(_memory_samples, {
+    "connectle_process_memory_bytes": ("gauge", "Memory per worker process (rss, pss, shared, private)"),
+})
+
+def snapshot():
+    """This worker's metrics as a JSON-serializable dict"""
+    samples = []
+    for collector in _collectors:
+        try:
+            samples.extend(collector())
+        except Exception as e:
+            logger.error(f"Metrics collector failed: {e}")
+    return {
+        "histograms": [[name, list(labels), list(h.counts), h.sum] for (name, labels), h in list(_histograms.items())],
+        "counters": [[name, list(labels), value] for (name, labels), value in list(_counters.items())],
+        "samples": [[name, list(labels), value, kind] for name, labels, value, kind in samples],
+    }
+
+def _metrics_dir():
+    return Config.METRICS_DIR
+
+def flush():
+    """Write this worker's snapshot atomically to METRICS_DIR"""
+    directory = _metrics_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{os.getpid()}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot(), f)
+    os.replace(tmp_path, path)
+
+def _start_flusher():
+    """Start one snapshot thread per worker process (after fork)"""
+    global _flusher_pid
+    if _flusher_pid == os.getpid():
+        return
+    _flusher_pid = os.getpid()
+
+    def run():
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                flush()
+            except Exception as e:
+                logger.error(f"Failed to write metrics snapshot: {e}")
+
+    threading.Thread(target=run, daemon=True).start()
+
+def _is_alive(pid):
+    try:
+        os.kill(int(pid), 0)
+        return True
+    except PermissionError:
+        return True
+    except (OSError, ValueError):
+        return False
+
+def _read_snapshots(directory, filenames):
+    """[(alive, snapshot)] for the files that can still be read"""
+    snapshots = []
+    for filename in filenames:
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                snapshots.append((_is_alive(filename[:-len(".json")]), json.load(f)))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+def _merge(snapshots):
+    histograms = {}
+    counters = defaultdict(float)
+    gauges = {}
+    for alive, data in snapshots:
+        for name, labels, counts, total in data.get("histograms", []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.setdefault(key, Histogram())
+            merged.counts = [a + b for a, b in zip(merged.counts, counts)]
+            merged.sum += total
+        for name, labels, value in data.get("counters", []):
+            counters[(name, tuple(tuple(pair) for pair in labels))] += value
+        for name, labels, value, kind in data.get("samples", []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            if kind != "counter" and not alive:
+                # Keep counters from exited workers so totals stay monotonic, but not their gauges
+                continue
+            if kind == "counter":
+                counters[key] += value
+            elif kind == "gauge_max":
+                gauges[key] = max(gauges.get(key, value), value)
+            else:
+                gauges[key] = gauges.get(key, 0) + value
+    return histograms, counters, gauges
+
+def _dead_snapshots(directory):
+    return [filename for filename in os.listdir(directory)
+            if filename.endswith(".json") and filename != RETIRED_FILE
+            and not _is_alive(filename[:-len(".json")])]
+
+def _retire_dead(directory):
+    """Fold exited workers' snapshots into RETIRED_FILE and delete them"""
+    if not _dead_snapshots(directory):
+        return
+    try:
+        import fcntl
+    except ImportError:
+        # No flock on this platform (e.g. Windows dev machines); leave the files
+        return
+
+    with open(os.path.join(directory, ".retire.lock"), "a+") as lock_file:
+        # One scraper at a time, so a dead snapshot is never folded in twice
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        dead = _dead_snapshots(directory)
+        if not dead:
+            return
+        histograms, counters, _ = _merge(_read_snapshots(directory, [RETIRED_FILE] + dead))
+        retired = {
+            "histograms": [[name, list(labels), h.counts, h.sum] for (name, labels), h in histograms.items()],
+            "counters": [[name, list(labels), value] for (name, labels), value in counters.items()],
+        }
+        path = os.path.join(directory, RETIRED_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(retired, f)
+        os.replace(f"{path}.tmp", path)
+        for filename in dead:
+            try:
+                os.remove(os.path.join(directory, filename))
+            except FileNotFoundError:
+                pass
+
+def collect():
+    """Merge the snapshots of every worker on this host"""
+    directory = _metrics_dir()
+    if not os.path.isdir(directory):
+        return _merge([])
+    try:
+        _retire_dead(directory)
+    except OSError as e:
+        logger.error(f"Failed to retire metrics snapshots: {e}")
+    return _merge(_read_snapshots(directory, [f for f in os.listdir(directory) if f.endswith(".json")]))
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+def _format_value(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+def render():
+    """Render merged metrics in Prometheus text exposition format"""
+    histograms, counters, gauges = collect()
+    by_name = defaultdict(list)
+    for (name, labels), value in histograms.items():
+        by_name[name].append((labels, value))
+    for (name, labels), value in counters.items():
+        by_name[name].append((labels, value))
+    for (name, labels), value in gauges.items():
+        by_name[name].append((labels, value))
+
+    lines = []
+    for name in sorted(by_name):
+        kind, help_text = HELP.get(name, ("gauge", name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {'gauge' if kind == 'gauge_max' else kind}")
+        for labels, value in sorted(by_name[name], key=lambda item: item[0]):
+            if isinstance(value, Histogram):
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (float("inf"),), value.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {value.sum!r}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+            else:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+def server_timing(spans, total):
+    """Format spans (seconds) as a Server-Timing header, with the remainder reported as app time"""
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in spans.items()]
+    parts.append(f"app;dur={max(total - sum(spans.values()), 0) * 1000:.1f}")
+    return ", ".join(parts)
+
+def _may_scrape():
+    if Config.METRICS_TOKEN:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), Config.METRICS_TOKEN.encode())
+    return Config.is_development() and request.remote_addr in LOCAL_ADDRESSES
+
+def init_app(app, limiter=None):
+    """Record per-route latency and status codes, add Server-Timing headers, and serve /api/metrics"""
+
+    @app.before_request
+    def start_timer():
+        _start_flusher()
+        g.metrics_start = time.perf_counter()
+        g.spans = {}
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            elapsed = time.perf_counter() - start
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            observe(REQUEST_DURATION, (("route", route), ("method", request.method)), elapsed)
+            inc(RESPONSES, (("route", route), ("status", str(response.status_code))))
+
+            spans = g.get("spans") or {}
+            response.headers["Server-Timing"] = server_timing(spans, elapsed)
+            # Let cross-origin pages (the frontend) read the timings
+            response.headers["Timing-Allow-Origin"] = "*"
+            if Config.SERVER_TIMING_LOG:
+                logger.info("server-timing", extra={"fields": {
+                    "route": route,
+                    "method": request.method,
+                    "status": response.status_code,
+                    "total_ms": round(elapsed * 1000, 1),
+                    **{f"{name}_ms": round(seconds * 1000, 1) for name, seconds in spans.items()},
+                }})
+        return response
+
+    def metrics_endpoint():
+        if not _may_scrape():
+            return jsonify({"error": "Forbidden"}), 403
+        try:
+            flush()
+        except Exception as e:
+            logger.error(f"Failed to write metrics snapshot: {e}")
+        return Response(render(), mimetype="text/plain; version=0.0.4")
+
+    if limiter is not None:
+        metrics_endpoint = limiter.exempt(metrics_endpoint)
+    app.add_url_rule("/api/metrics", "metrics", metrics_endpoint)
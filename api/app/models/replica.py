@@ -0,0 +1,176 @@
+"""
+Local SQLite read replica of the puzzles and puzzle_schedule tables.
+
+Supabase stays the source of truth: the scheduler leader mirrors both tables
+into REPLICA_PATH (see sync_replica in supabase_config) and every worker on the
+host reads from the file. Reads are indexed local queries that keep working
+while Supabase is unreachable. Until the first sync completes the replica
+reports not ready and callers fall back to Supabase.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+create table if not exists puzzles (
+    id text primary key,
+    start_word text not null,
+    end_word text not null,
+    start_definition text,
+    end_definition text,
+    transition_graph text,
+    date text,
+    created_at text,
+    is_daily integer not null default 0,
+    difficulty real
+);
+create index if not exists puzzles_is_daily_idx on puzzles(is_daily);
+create index if not exists puzzles_created_at_id_idx on puzzles(created_at desc, id desc);
+create table if not exists puzzle_schedule (
+    date text primary key,
+    puzzle_id text not null
+);
+create table if not exists sync_state (
+    table_name text primary key,
+    synced_at real not null,
+    row_count integer not null
+);
+"""
+
+PUZZLE_COLUMNS = ("id", "start_word", "end_word", "start_definition", "end_definition",
+                  "transition_graph", "date", "created_at", "is_daily", "difficulty")
+
+def _to_row(puzzle):
+    values = [puzzle.get(column) for column in PUZZLE_COLUMNS]
+    values[PUZZLE_COLUMNS.index("transition_graph")] = json.dumps(puzzle.get("transition_graph"))
+    values[PUZZLE_COLUMNS.index("is_daily")] = 1 if puzzle.get("is_daily") else 0
+    return values
+
+def _from_row(row):
+    puzzle = dict(zip(PUZZLE_COLUMNS, row))
+    puzzle["transition_graph"] = json.loads(puzzle["transition_graph"]) if puzzle["transition_graph"] else None
+    puzzle["is_daily"] = bool(puzzle["is_daily"])
+    return puzzle
+
+_SELECT = f"select {', '.join('p.' + column for column in PUZZLE_COLUMNS)} from puzzles p"
+
+class PuzzleReplica:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._schema_ready = False
+        self._ready = False
+
+    def _connection(self):
+        """One connection per thread, reopened after a fork"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("pragma journal_mode=wal")
+            if not self._schema_ready:
+                conn.executescript(SCHEMA)
+                self._schema_ready = True
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def is_ready(self):
+        """True once the puzzles table has been synced at least once (by any process)"""
+        if self._ready:
+            return True
+        if not self.path:
+            return False
+        try:
+            row = self._connection().execute(
+                "select row_count from sync_state where table_name = 'puzzles'"
+            ).fetchone()
+        except sqlite3.Error:
+            return False
+        self._ready = bool(row and row[0])
+        return self._ready
+
+    def synced_at(self, table_name="puzzles"):
+        row = self._connection().execute(
+            "select synced_at from sync_state where table_name = ?", (table_name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _replace(self, table_name, delete_sql, delete_params, insert_sql, rows):
+        conn = self._connection()
+        conn.execute("begin immediate")
+        try:
+            conn.execute(delete_sql, delete_params)
+            conn.executemany(insert_sql, rows)
+            conn.execute(
+                "insert or replace into sync_state (table_name, synced_at, row_count) values (?, ?, ?)",
+                (table_name, time.time(), len(rows)),
+            )
+            conn.execute("commit")
+        except Exception:
+            conn.execute("rollback")
+            raise
+
+    def replace_puzzles(self, puzzles):
+        """Mirror the full puzzles table in one transaction, so readers never see a partial copy"""
+        placeholders = ", ".join("?" for _ in PUZZLE_COLUMNS)
+        self._replace(
+            "puzzles",
+            "delete from puzzles",
+            (),
+            f"insert into puzzles ({', '.join(PUZZLE_COLUMNS)}) values ({placeholders})",
+            [_to_row(puzzle) for puzzle in puzzles],
+        )
+
+    def replace_schedule(self, entries, since):
+        """Mirror schedule entries dated on or after `since` (ISO date)"""
+        conn = self._connection()
+        rows = [(entry["date"], entry["puzzle_id"]) for entry in entries]
+        self._replace(
+            "puzzle_schedule",
+            "delete from puzzle_schedule where date >= ?",
+            (since,),
+            "insert or replace into puzzle_schedule (date, puzzle_id) values (?, ?)",
+            rows,
+        )
+        # Keep a week of history for late readers around midnight
+        conn.execute("delete from puzzle_schedule where date < date(?, '-7 days')", (since,))
+
+    def puzzles(self):
+        return [_from_row(row) for row in self._connection().execute(_SELECT)]
+
+    def puzzle(self, puzzle_id):
+        row = self._connection().execute(f"{_SELECT} where p.id = ?", (puzzle_id,)).fetchone()
+        return _from_row(row) if row else None
+
+    def scheduled_puzzle(self, day):
+        row = self._connection().execute(
+            f"{_SELECT} join puzzle_schedule s on s.puzzle_id = p.id where s.date = ?", (day,)
+        ).fetchone()
+        return _from_row(row) if row else None
+
+    def upcoming_puzzle_ids(self, since):
+        """Ids of puzzles scheduled on or after `since` (ISO date)"""
+        rows = self._connection().execute("select puzzle_id from puzzle_schedule where date >= ?", (since,))
+        return {row[0] for row in rows}
+
+    def page(self, limit, before=None, released_before=None):
+        """
+        Non-daily puzzles newest first, after the (created_at, id) cursor, leaving out
+        any scheduled on or after `released_before` (ISO date) so upcoming ones stay hidden
+        """
+        where = "where p.is_daily = 0"
+        params = []
+        if released_before:
+            where += " and p.id not in (select puzzle_id from puzzle_schedule where date >= ?)"
+            params.append(released_before)
+        if before:
+            where += " and (p.created_at, p.id) < (?, ?)"
+            params.extend(before)
+        query = f"{_SELECT} {where} order by p.created_at desc, p.id desc limit ?"
+        return [_from_row(row) for row in self._connection().execute(query, (*params, limit))]
@@ -1,18 +1,32 @@
 import os
-import requests
-from dotenv import load_dotenv
-from supabase import create_client, Client
+import time
+import json
+import hmac
+import base64
+import hashlib
+import sqlite3
+from datetime import date, timedelta
 import logging
 from ..config import Config
+from ..metrics import track_upstream
+from ..admission import Overloaded
+from ..services.cache import LRUCache
+from .replica import PuzzleReplica
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Table names
 PUZZLES_TABLE = "puzzles"
 USER_PUZZLE_STATS_TABLE = "user_puzzle_stats"
 PUZZLE_STATS_TABLE = "puzzle_stats"
+PUZZLE_SCHEDULE_TABLE = "puzzle_schedule"
+PUZZLE_DISTRIBUTIONS_TABLE = "puzzle_distributions"
+
+# Number of calendar days kept in the schedule cache
+SCHEDULE_CACHE_DAYS = 7
+
+# Columns returned for archive listings; definitions are only fetched per puzzle
+ARCHIVE_COLUMNS = "id, start_word, end_word, difficulty, created_at"
 
 # Mock data for development/fallback
 MOCK_PUZZLES = [{
@@ -22,15 +36,102 @@ MOCK_PUZZLES = [{
     "end_definition": "Having or giving out a moderate degree of heat"
 }]
 
-# Supabase client instance
-supabase: Client = None
+def is_stored_puzzle(puzzle):
+    """True for a row read from Supabase or the replica, False for the MOCK_PUZZLES fallback"""
+    return bool(puzzle) and all(puzzle is not mock for mock in MOCK_PUZZLES)
+
+# Supabase client instance (supabase.Client), created on first use
+supabase = None
+
+# Scheduled puzzles keyed by ISO date
+_schedule_cache = {}
+
+# Local SQLite mirror of puzzles and the schedule, read before Supabase when synced
+_replica = PuzzleReplica(Config.REPLICA_PATH) if Config.REPLICA_PATH else None
+
+# Rows per request when mirroring the puzzles table
+REPLICA_SYNC_PAGE_SIZE = 1000
+
+# Puzzle rows by id; a puzzle's words and definitions don't change once generated
+_puzzle_cache = LRUCache("puzzle", max_size=2000, ttl=3600)
+
+# Ids of puzzles scheduled for today or later, keyed by ISO date
+_unreleased_cache = LRUCache("unreleased_puzzles", max_size=4, ttl=60)
+
+# Access tokens (by hash) checked with Supabase Auth -> user id
+_token_cache = LRUCache("auth_token", max_size=5000, ttl=60)
+
+def _b64decode(segment):
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+def _verify_jwt(token, secret):
+    """User id (sub) from an HS256 Supabase access token signed with secret, or None"""
+    try:
+        header_segment, payload_segment, signature_segment = token.split(".")
+        if json.loads(_b64decode(header_segment)).get("alg") != "HS256":
+            return None
+        expected = hmac.new(secret.encode(), f"{header_segment}.{payload_segment}".encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature_segment)):
+            return None
+        claims = json.loads(_b64decode(payload_segment))
+    except (ValueError, TypeError, AttributeError):
+        return None
+    if not isinstance(claims, dict) or claims.get("role") != "authenticated":
+        return None
+    if not isinstance(claims.get("exp"), (int, float)) or claims["exp"] < time.time():
+        return None
+    return claims.get("sub")
+
+def _key_role(key):
+    """The role claim of a JWT API key (read, not verified), or None for other key formats"""
+    try:
+        claims = json.loads(_b64decode(key.split(".")[1]))
+    except (ValueError, TypeError, IndexError):
+        return None
+    return claims.get("role") if isinstance(claims, dict) else None
+
+def verify_access_token(token):
+    """Return the user id of a valid Supabase access token, or None"""
+    if not token:
+        return None
+    if Config.SUPABASE_JWT_SECRET:
+        return _verify_jwt(token, Config.SUPABASE_JWT_SECRET)
+
+    key = hashlib.sha256(token.encode()).hexdigest()
+    user_id = _token_cache.get(key)
+    if user_id:
+        return user_id
+
+    client = get_client()
+    if not client:
+        return None
+    try:
+        with track_upstream("supabase", "get_user"):
+            response = client.auth.get_user(token)
+    except Overloaded:
+        raise
+    except Exception as e:
+        logger.warning(f"Access token rejected by Supabase Auth: {str(e)}")
+        return None
+
+    user = getattr(response, "user", None)
+    user_id = getattr(user, "id", None)
+    if user_id:
+        _token_cache.set(key, user_id)
+    return user_id
 
 def init_supabase():
     """Initialize Supabase client with error handling"""
     global supabase
     try:
         if Config.has_valid_supabase_config():
+            # Imported here because the supabase package is slow to import on cold starts
+            from supabase import create_client
             supabase = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+            role = _key_role(Config.SUPABASE_KEY)
+            if role and role != "service_role":
+                logger.warning(f"SUPABASE_KEY is a {role} key; recording results and rotating "
+                               f"puzzles need the service role key")
             return True
         else:
             logger.warning("Invalid Supabase configuration. Using mock data.")
@@ -39,8 +140,92 @@ def init_supabase():
         logger.error(f"Failed to initialize Supabase client: {str(e)}")
         return False
 
+def get_client():
+    """Return the shared Supabase client, initializing it on first use"""
+    if not supabase and not init_supabase():
+        return None
+    return supabase
+
+def read_replica(read, allow_stale=False):
+    """
+    Run read(replica) against the local replica if it has been synced, else return None.
+    Unless allow_stale, a replica not synced within REPLICA_MAX_AGE is skipped so Supabase
+    stays the source of truth; stale data is still better than nothing during an outage.
+    In development without Supabase the replica is always used, as a local store.
+    """
+    if _replica is None or not _replica.is_ready():
+        return None
+    try:
+        offline = Config.is_development() and not Config.has_valid_supabase_config()
+        if not (allow_stale or offline) and time.time() - (_replica.synced_at() or 0) > Config.REPLICA_MAX_AGE:
+            return None
+        return read(_replica)
+    except sqlite3.Error as e:
+        logger.error(f"Error reading local replica: {str(e)}")
+        return None
+
+def _replica_or_shed(error, read):
+    """
+    A shed Supabase call may still be answered from the replica, however stale;
+    with nothing there the Overloaded goes up as a 503, never as mock data
+    """
+    result = read_replica(read, allow_stale=True)
+    if result is None:
+        raise error
+    return result
+
+def _after_cursor(query, before):
+    """Keyset condition (created_at, id) < before, spelled out for PostgREST"""
+    created_at, puzzle_id = before
+    return query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{puzzle_id})')
+
+def sync_replica():
+    """Mirror the puzzles table and the schedule from yesterday on into the local replica"""
+    if _replica is None:
+        return None
+    client = get_client()
+    if not client:
+        return None
+
+    started = time.perf_counter()
+    puzzles = []
+    before = None
+    while True:
+        query = client.table(PUZZLES_TABLE).select("*")
+        if before:
+            query = _after_cursor(query, before)
+        with track_upstream("supabase", "sync_replica"):
+            response = query \
+                .order("created_at", desc=True) \
+                .order("id", desc=True) \
+                .limit(REPLICA_SYNC_PAGE_SIZE) \
+                .execute()
+        rows = response.data or []
+        puzzles.extend(rows)
+        if len(rows) < REPLICA_SYNC_PAGE_SIZE:
+            break
+        before = (rows[-1]["created_at"], rows[-1]["id"])
+
+    since = (date.today() - timedelta(days=1)).isoformat()
+    with track_upstream("supabase", "sync_replica"):
+        schedule = client.table(PUZZLE_SCHEDULE_TABLE) \
+            .select("date, puzzle_id") \
+            .gte("date", since) \
+            .execute()
+
+    _replica.replace_puzzles(puzzles)
+    _replica.replace_schedule(schedule.data or [], since)
+    stats = {"puzzles": len(puzzles), "schedule": len(schedule.data or []),
+             "duration_seconds": round(time.perf_counter() - started, 3)}
+    logger.info(f"Synced local replica: {stats}")
+    return stats
+
 def get_puzzles():
     """Get all puzzles from Supabase with fallback to mock data"""
+    puzzles = read_replica(lambda replica: replica.puzzles())
+    if puzzles:
+        return puzzles
+
     try:
         # In development without valid Supabase config, return mock data
         if Config.is_development() and not Config.has_valid_supabase_config():
@@ -53,13 +238,218 @@ def get_puzzles():
             return MOCK_PUZZLES
 
         # Fetch puzzles from Supabase
-        response = supabase.table(PUZZLES_TABLE).select("*").execute()
+        with track_upstream("supabase", "get_puzzles"):
+            response = supabase.table(PUZZLES_TABLE).select("*").execute()
         if response.data:
             return response.data
         
         logger.warning("No puzzles found in database, using mock data")
         return MOCK_PUZZLES
         
+    except Overloaded as e:
+        return _replica_or_shed(e, lambda replica: replica.puzzles() or None)
     except Exception as e:
         logger.error(f"Error fetching puzzles: {str(e)}")
-        return MOCK_PUZZLES
+        return read_replica(lambda replica: replica.puzzles(), allow_stale=True) or MOCK_PUZZLES
+
+
+def get_scheduled_puzzle(day=None):
+    """Get the puzzle scheduled for a calendar date (default today), or None if none is scheduled"""
+    day = (day or date.today()).isoformat()
+    if day in _schedule_cache:
+        return _schedule_cache[day]
+
+    puzzle = read_replica(lambda replica: replica.scheduled_puzzle(day))
+    if puzzle:
+        _schedule_cache[day] = puzzle
+        return puzzle
+
+    try:
+        if Config.is_development() and not Config.has_valid_supabase_config():
+            return None
+
+        client = get_client()
+        if not client:
+            return None
+
+        # Point lookup on the date primary key, with the puzzle row embedded
+        with track_upstream("supabase", "get_scheduled_puzzle"):
+            response = client.table(PUZZLE_SCHEDULE_TABLE) \
+                .select(f"date, {PUZZLES_TABLE}(*)") \
+                .eq("date", day) \
+                .limit(1) \
+                .execute()
+        puzzle = response.data[0][PUZZLES_TABLE] if response.data else None
+    except Overloaded as e:
+        return _replica_or_shed(e, lambda replica: replica.scheduled_puzzle(day))
+    except Exception as e:
+        logger.error(f"Error fetching scheduled puzzle for {day}: {str(e)}")
+        return read_replica(lambda replica: replica.scheduled_puzzle(day), allow_stale=True)
+
+    # Only cache hits, since a missing date may be scheduled later
+    if puzzle:
+        _schedule_cache[day] = puzzle
+        for old_day in sorted(_schedule_cache)[:-SCHEDULE_CACHE_DAYS]:
+            del _schedule_cache[old_day]
+    return puzzle
+
+def clear_schedule_cache(before=None):
+    """Drop cached schedule entries (only those dated before `before`, if given)"""
+    if before is None:
+        _schedule_cache.clear()
+        return
+    for day in [d for d in _schedule_cache if d < before.isoformat()]:
+        del _schedule_cache[day]
+
+def record_puzzle_results(results):
+    """
+    Write a batch of pre-aggregated game results in one call to the record_puzzle_results
+    function. Returns True on success; raises on database errors so the caller can retry.
+    """
+    if not results:
+        return True
+    if Config.is_development() and not Config.has_valid_supabase_config():
+        logger.info(f"Development mode: discarding {len(results)} puzzle results")
+        return True
+
+    client = get_client()
+    if not client:
+        raise RuntimeError("Supabase client is not available")
+
+    with track_upstream("supabase", "record_puzzle_results"):
+        client.rpc("record_puzzle_results", {"results": results}).execute()
+    return True
+
+def get_puzzle_distribution(puzzle_id):
+    """Return the histogram rows (metric, value, count) for a puzzle, [] if none, or None on errors"""
+    try:
+        if Config.is_development() and not Config.has_valid_supabase_config():
+            return []
+
+        client = get_client()
+        if not client:
+            return None
+
+        with track_upstream("supabase", "get_puzzle_distribution"):
+            response = client.table(PUZZLE_DISTRIBUTIONS_TABLE) \
+                .select("metric, value, count") \
+                .eq("puzzle_id", puzzle_id) \
+                .execute()
+        return response.data or []
+    except Overloaded:
+        # No local copy to fall back on, so let the route answer 503 with Retry-After
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching distribution for puzzle {puzzle_id}: {str(e)}")
+        return None
+
+def get_unreleased_puzzle_ids():
+    """
+    Ids of puzzles scheduled for today or later, which the archive must not reveal.
+    Returns None when the schedule can't be read, so callers can refuse rather than spoil.
+    """
+    today = date.today().isoformat()
+    ids = _unreleased_cache.get(today)
+    if ids is not None:
+        return ids
+
+    ids = read_replica(lambda replica: replica.upcoming_puzzle_ids(today))
+    if ids is None:
+        try:
+            if Config.is_development() and not Config.has_valid_supabase_config():
+                return set()
+
+            client = get_client()
+            if not client:
+                return None
+
+            with track_upstream("supabase", "get_unreleased_puzzle_ids"):
+                response = client.table(PUZZLE_SCHEDULE_TABLE) \
+                    .select("puzzle_id") \
+                    .gte("date", today) \
+                    .execute()
+            ids = {row["puzzle_id"] for row in response.data or []}
+        except Overloaded as e:
+            return _replica_or_shed(e, lambda replica: replica.upcoming_puzzle_ids(today))
+        except Exception as e:
+            logger.error(f"Error fetching upcoming schedule: {str(e)}")
+            ids = read_replica(lambda replica: replica.upcoming_puzzle_ids(today), allow_stale=True)
+            if ids is None:
+                return None
+
+    _unreleased_cache.set(today, ids)
+    return ids
+
+def list_puzzle_page(limit, before=None):
+    """
+    Return up to `limit` puzzle summaries, newest first, leaving out the current daily puzzle
+    and any puzzle scheduled for today or later. `before` is the (created_at, id) of the last
+    row of the previous page; returns None on errors.
+    """
+    today = date.today().isoformat()
+    page = read_replica(lambda replica: replica.page(limit, before, released_before=today))
+    if page is not None:
+        return page
+
+    try:
+        if Config.is_development() and not Config.has_valid_supabase_config():
+            return []
+
+        client = get_client()
+        if not client:
+            return None
+
+        unreleased = get_unreleased_puzzle_ids()
+        if unreleased is None:
+            return read_replica(lambda replica: replica.page(limit, before, released_before=today), allow_stale=True)
+
+        query = client.table(PUZZLES_TABLE) \
+            .select(ARCHIVE_COLUMNS) \
+            .eq("is_daily", False)
+        if unreleased:
+            query = query.not_.in_("id", sorted(unreleased))
+        if before:
+            query = _after_cursor(query, before)
+        with track_upstream("supabase", "list_puzzle_page"):
+            response = query \
+                .order("created_at", desc=True) \
+                .order("id", desc=True) \
+                .limit(limit) \
+                .execute()
+        return response.data or []
+    except Overloaded as e:
+        return _replica_or_shed(e, lambda replica: replica.page(limit, before, released_before=today))
+    except Exception as e:
+        logger.error(f"Error listing puzzles: {str(e)}")
+        return read_replica(lambda replica: replica.page(limit, before, released_before=today), allow_stale=True)
+
+def get_puzzle(puzzle_id):
+    """Get one puzzle row by id through the read-through cache, or None if not found"""
+    puzzle = _puzzle_cache.get(puzzle_id) or read_replica(lambda replica: replica.puzzle(puzzle_id))
+    if puzzle is not None:
+        return puzzle
+
+    try:
+        if Config.is_development() and not Config.has_valid_supabase_config():
+            return None
+
+        client = get_client()
+        if not client:
+            return None
+
+        with track_upstream("supabase", "get_puzzle"):
+            response = client.table(PUZZLES_TABLE) \
+                .select("*") \
+                .eq("id", puzzle_id) \
+                .limit(1) \
+                .execute()
+    except Overloaded as e:
+        return _replica_or_shed(e, lambda replica: replica.puzzle(puzzle_id))
+    except Exception as e:
+        logger.error(f"Error fetching puzzle {puzzle_id}: {str(e)}")
+        return read_replica(lambda replica: replica.puzzle(puzzle_id), allow_stale=True)
+
+    puzzle = response.data[0] if response.data else None
+    if puzzle:
+        _puzzle_cache.set(puzzle_id, puzzle)
+    return puzzle
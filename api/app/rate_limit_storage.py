@@ -0,0 +1,167 @@
+"""
+SQLite-backed rate limit storage shared by every worker process on a host.
+
+Registered with the `limits` library under the "sqlite" scheme, so flask_limiter
+can use it with a storage URI such as ``sqlite:////tmp/connectle-ratelimit.db``.
+Each rate limit key is one row (key, count, expires_at) looked up by primary key,
+and expired rows are compacted away periodically.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+
+from limits.storage import Storage
+
+try:
+    from limits.storage import SlidingWindowCounterSupport
+except ImportError:  # limits < 4.1 has no sliding window counter strategy
+    SlidingWindowCounterSupport = object
+
+# Seconds between sweeps that delete expired keys
+COMPACTION_INTERVAL = 60
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport):
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        self.path = uri.split("://", 1)[1] or ":memory:"
+        self._local = threading.local()
+        self._next_compaction = 0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        with self._transaction() as conn:
+            conn.execute(
+                "create table if not exists rate_limits ("
+                " key text primary key,"
+                " count integer not null,"
+                " expires_at real not null"
+                ") without rowid"
+            )
+            conn.execute("create index if not exists rate_limits_expires_at_idx on rate_limits(expires_at)")
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self):
+        """One connection per thread, reopened after a fork"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("pragma journal_mode=wal")
+            conn.execute("pragma synchronous=off")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def _compact(self, conn, now):
+        if now < self._next_compaction:
+            return
+        self._next_compaction = now + COMPACTION_INTERVAL
+        conn.execute("delete from rate_limits where expires_at <= ?", (now,))
+
+    def _incr(self, conn, key, expiry, amount, now):
+        row = conn.execute("select count, expires_at from rate_limits where key = ?", (key,)).fetchone()
+        if row is None or row[1] <= now:
+            count = amount
+            conn.execute(
+                "insert or replace into rate_limits (key, count, expires_at) values (?, ?, ?)",
+                (key, count, now + expiry),
+            )
+        else:
+            count = row[0] + amount
+            conn.execute("update rate_limits set count = ? where key = ?", (count, key))
+        return count
+
+    def _get(self, conn, key, now):
+        row = conn.execute("select count, expires_at from rate_limits where key = ?", (key,)).fetchone()
+        if row is None or row[1] <= now:
+            return 0, 0.0
+        return row[0], row[1]
+
+    def incr(self, key, expiry, elastic_expiry=False, amount=1):
+        now = time.time()
+        with self._transaction() as conn:
+            self._compact(conn, now)
+            count = self._incr(conn, key, expiry, amount, now)
+            if elastic_expiry:
+                conn.execute("update rate_limits set expires_at = ? where key = ?", (now + expiry, key))
+            return count
+
+    def get(self, key):
+        return self._get(self._connection(), key, time.time())[0]
+
+    def get_expiry(self, key):
+        now = time.time()
+        expires_at = self._get(self._connection(), key, now)[1]
+        return expires_at or now
+
+    def check(self):
+        try:
+            self._connection().execute("select 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        with self._transaction() as conn:
+            return conn.execute("delete from rate_limits").rowcount
+
+    def clear(self, key):
+        with self._transaction() as conn:
+            conn.execute("delete from rate_limits where key = ?", (key,))
+
+    # Sliding window counter support: one fixed-window counter per window index
+
+    def _window_keys(self, key, expiry, now):
+        window = int(now // expiry)
+        return f"{key}/{window - 1}", f"{key}/{window}"
+
+    def _sliding_window(self, conn, key, expiry, now):
+        previous_key, current_key = self._window_keys(key, expiry, now)
+        previous_count = self._get(conn, previous_key, now)[0]
+        current_count = self._get(conn, current_key, now)[0]
+        previous_ttl = (1 - ((now / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._transaction() as conn:
+            self._compact(conn, now)
+            previous_count, previous_ttl, current_count, _ = self._sliding_window(conn, key, expiry, now)
+            weighted_count = previous_count * previous_ttl / expiry + current_count
+            if floor(weighted_count) + amount > limit:
+                return False
+            # Keep the counter for two windows so it can serve as the next "previous" window
+            self._incr(conn, self._window_keys(key, expiry, now)[1], 2 * expiry, amount, now)
+            return True
+
+    def get_sliding_window(self, key, expiry):
+        return self._sliding_window(self._connection(), key, expiry, time.time())
+
+    def clear_sliding_window(self, key, expiry):
+        with self._transaction() as conn:
+            for window_key in self._window_keys(key, expiry, time.time()):
+                conn.execute("delete from rate_limits where key = ?", (window_key,))
+
+class _Transaction:
+    """Immediate-mode transaction, so concurrent read-modify-write hits serialize across processes"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("begin immediate")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("rollback" if exc_type else "commit")
+        return False
@@ -1,34 +1,59 @@
 from flask import Blueprint, request, jsonify
 from .services.game_service import GameService
 from . import limiter
+from .cron import register_rotation_listener
+from .metrics import track_upstream
+from .admission import Overloaded
+from .services import cache_snapshot
 import logging
 
 main = Blueprint('main', __name__)
 logger = logging.getLogger(__name__)
 game_service = GameService()
 
+# Drop the cached daily puzzle (and its ETag) whenever the puzzle rotates
+register_rotation_listener(game_service.invalidate_daily)
+
+# Start warm from the last snapshot of the daily puzzle and upstream results
+cache_snapshot.restore(game_service)
+
+def save_cache_snapshot():
+    """Rewrite the snapshot so it no longer carries the previous daily puzzle"""
+    try:
+        cache_snapshot.save(game_service)
+    except Exception as e:
+        logger.error(f"Failed to write cache snapshot: {str(e)}")
+
+register_rotation_listener(save_cache_snapshot)
+
+@main.before_app_request
+def start_cache_snapshot_writer():
+    cache_snapshot.start_writer(game_service)
+
 @main.route('/api/daily-puzzle', methods=['GET'])
 @limiter.limit("30 per minute")
 def get_daily_puzzle():
-    return game_service.get_daily_puzzle()
+    # Answers If-None-Match / If-Modified-Since with a 304 when the puzzle is unchanged
+    return game_service.get_daily_puzzle().make_conditional(request)
 
 @main.route('/api/validate-word', methods=['GET', 'POST'])
 @limiter.limit("60 per minute")
 def validate_word():
-    logger.info(f"Received validate-word request: {request.data}")
     try:
         # Handle both GET and POST requests
         if request.method == 'POST':
             data = request.get_json()
-            logger.info(f"Parsed JSON data: {data}")
         else:  # GET request
             data = {
                 'current_word': request.args.get('current_word'),
-                'next_word': request.args.get('next_word')
+                'next_word': request.args.get('next_word'),
+                'target_word': request.args.get('target_word')
             }
-            logger.info(f"GET request data: {data}")
+        logger.info("validate-word", extra={"fields": {"method": request.method, "data": data}})
         
         return game_service.validate_word(data)
+    except Overloaded:
+        raise
     except Exception as e:
         logger.error(f"Error in validate_word: {str(e)}")
         return jsonify({"error": f"Server error: {str(e)}"}), 500
@@ -55,7 +80,6 @@ def check_similarity():
 @limiter.limit("60 per minute")
 def check_word():
     word = request.args.get('word')
-    logger.info(f"Checking word validity: {word}")
     
     if not word:
         logger.warning("Missing word parameter")
@@ -68,17 +92,18 @@ def check_word():
         from .config import Config
         
         hf_space_url = Config.HF_SPACE_URL
-        logger.info(f"Making request to HF Space: {hf_space_url}/check-word?word={word}")
         
-        response = requests.get(
-            f"{hf_space_url}/check-word",
-            params={"word": word}
-        )
+        with track_upstream("hf", "check-word"):
+            response = requests.get(
+                f"{hf_space_url}/check-word",
+                params={"word": word},
+                timeout=Config.HF_TIMEOUT
+            )
         
         if response.status_code == 200:
             result = response.json()
             is_valid = result.get("is_valid", False)
-            logger.info(f"Word '{word}' validity: {is_valid}")
+            logger.info("check-word", extra={"fields": {"word": word, "is_valid": is_valid}})
             return jsonify({"is_valid": is_valid})
         else:
             logger.error(f"Error from HF Space: {response.text}")
@@ -86,8 +111,52 @@ def check_word():
             logger.warning(f"Using fallback validation for '{word}'")
             return jsonify({"is_valid": True})  # Assume valid as a fallback
             
+    except Overloaded:
+        raise
     except Exception as e:
         logger.error(f"Error checking word validity: {str(e)}")
         # In case of error, assume the word is valid to not block the user
         logger.warning(f"Exception occurred, assuming '{word}' is valid")
         return jsonify({"is_valid": True})
+
+@main.route('/api/puzzle-stats', methods=['POST'])
+@limiter.limit("30 per minute")
+def submit_puzzle_stats():
+    # Buffered and written in batches, so the response does not wait for the database
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    access_token = token.strip() if scheme.lower() == 'bearer' else None
+    return game_service.record_result(request.get_json(silent=True), access_token)
+
+@main.route('/api/puzzle-stats/<puzzle_id>', methods=['GET'])
+@limiter.limit("60 per minute")
+def get_puzzle_stats(puzzle_id):
+    return game_service.get_distribution(puzzle_id)
+
+@main.route('/api/suggest', methods=['GET'])
+@limiter.limit("120 per minute")
+def suggest():
+    data = {
+        'prefix': request.args.get('prefix'),
+        'limit': request.args.get('limit'),
+        'current_word': request.args.get('current_word')
+    }
+    return game_service.suggest(data)
+
+@main.route('/api/define', methods=['GET'])
+@limiter.limit("120 per minute")
+def define():
+    return game_service.define(request.args.get('word'))
+
+@main.route('/api/puzzles', methods=['GET'])
+@limiter.limit("60 per minute")
+def list_puzzles():
+    data = {
+        'limit': request.args.get('limit'),
+        'cursor': request.args.get('cursor')
+    }
+    return game_service.list_archive(data)
+
+@main.route('/api/puzzles/<puzzle_id>', methods=['GET'])
+@limiter.limit("60 per minute")
+def get_puzzle(puzzle_id):
+    return game_service.get_practice_puzzle(puzzle_id)
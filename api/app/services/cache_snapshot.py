@@ -0,0 +1,112 @@
+"""
+Snapshots of the warm in-process caches, so new instances start warm.
+
+A snapshot holds today's daily puzzle row and the most recently used similarity
+and hint results. It is written as gzipped JSON to CACHE_SNAPSHOT_PATH by a
+background thread (only when something changed) and after each rotation, and
+loaded on boot from that file or, failing that, from the CACHE_SNAPSHOT_BUNDLE
+shipped with the deployment. Snapshots from another format version or another
+HF Space are ignored, the daily puzzle is only restored on the day it was
+current (and served without a recheck for what is left of DAILY_PUZZLE_TTL
+after the save), and cached results older than CACHE_SNAPSHOT_MAX_AGE_HOURS
+are skipped. Every worker may save; each writes its own temporary file and
+renames it over the snapshot, so readers never see a partial one.
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+# Bump when the snapshot layout or the cached values' format changes
+SNAPSHOT_VERSION = 1
+
+_writer_pid = None
+_last_signature = None
+
+def _signature(service):
+    """Changes whenever a cache gains entries or the daily puzzle changes"""
+    caches = (service.similarity_cache, service.hint_cache)
+    return tuple(cache.misses for cache in caches) + tuple(len(cache) for cache in caches) + (service._daily[0],)
+
+def save(service, path=None):
+    """Write the service's warm state atomically; returns the snapshot path"""
+    global _last_signature
+    path = path or Config.CACHE_SNAPSHOT_PATH
+    signature = _signature(service)
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "source": Config.HF_SPACE_URL,
+        "created_at": time.time(),
+        **service.export_state(Config.CACHE_SNAPSHOT_MAX_ENTRIES),
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, "wt", compresslevel=6) as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    _last_signature = signature
+    return path
+
+def _read(path):
+    """Return the snapshot at path if it is usable here, else None"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rt") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable cache snapshot {path}: {e}")
+        return None
+
+    if data.get("version") != SNAPSHOT_VERSION or data.get("source") != Config.HF_SPACE_URL:
+        logger.info(f"Ignoring cache snapshot {path} from another version or HF Space")
+        return None
+    return data
+
+def restore(service, paths=None):
+    """Load the first usable snapshot into the service; returns counts of restored entries"""
+    for path in paths or (Config.CACHE_SNAPSHOT_PATH, Config.CACHE_SNAPSHOT_BUNDLE):
+        data = _read(path)
+        if data is None:
+            continue
+
+        age_hours = (time.time() - data.get("created_at", 0)) / 3600
+        if age_hours > Config.CACHE_SNAPSHOT_MAX_AGE_HOURS:
+            # Cached results may be stale, but the daily puzzle is still valid on its own date
+            data = {**data, "caches": {}}
+        try:
+            counts = service.restore_state(data)
+        except Exception as e:
+            logger.error(f"Failed to restore cache snapshot {path}: {e}")
+            continue
+        logger.info(f"Restored cache snapshot {path} ({age_hours:.1f}h old): {counts}")
+        return counts
+    return None
+
+def start_writer(service):
+    """Start one snapshot thread per worker process (after fork)"""
+    global _writer_pid
+    if _writer_pid == os.getpid() or Config.CACHE_SNAPSHOT_INTERVAL <= 0:
+        return
+    _writer_pid = os.getpid()
+
+    def run():
+        while True:
+            time.sleep(Config.CACHE_SNAPSHOT_INTERVAL)
+            if _signature(service) == _last_signature:
+                continue
+            try:
+                save(service)
+            except Exception as e:
+                logger.error(f"Failed to write cache snapshot: {e}")
+
+    threading.Thread(target=run, daemon=True).start()
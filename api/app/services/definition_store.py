@@ -0,0 +1,107 @@
+import os
+import mmap
+import struct
+import threading
+import logging
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CNDEF001"
+HEADER = struct.Struct("<8sI")
+# (key offset, value offset) into the data section, one per entry plus a terminator
+ENTRY = struct.Struct("<II")
+
+def write_definitions(path, definitions):
+    """
+    Write {word: definition} as a sorted, memory-mappable key-value file:
+    header, offset index, then the concatenated key and value bytes.
+    """
+    items = sorted((word.lower().encode("utf-8"), text.encode("utf-8")) for word, text in definitions.items())
+    index = []
+    data = bytearray()
+    for key, value in items:
+        index.append((len(data), len(data) + len(key)))
+        data += key
+        data += value
+    index.append((len(data), len(data)))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(items)))
+        for key_offset, value_offset in index:
+            f.write(ENTRY.pack(key_offset, value_offset))
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(items)
+
+class DefinitionStore:
+    """
+    Word definitions read from the file written by scripts/build_definitions.py.
+
+    The file is memory-mapped, so it costs no heap and pages are shared between
+    workers. A lookup is a binary search over the sorted keys, with no NLTK import.
+    """
+
+    def __init__(self, path=None):
+        self.path = path if path is not None else Config.DEFINITIONS_PATH
+        self.count = 0
+        self._view = None
+        self._data_start = 0
+        self._lock = threading.Lock()
+        self._load_attempted = False
+
+    def load(self):
+        """Map the definitions file once; return True if available"""
+        if self._load_attempted:
+            return self._view is not None
+
+        with self._lock:
+            if self._load_attempted:
+                return self._view is not None
+            self._load_attempted = True
+
+            if not self.path or not os.path.exists(self.path):
+                logger.warning(f"Definitions file not found at {self.path}, /api/define is disabled")
+                return False
+
+            try:
+                with open(self.path, "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, count = HEADER.unpack_from(mapped, 0)
+                if magic != MAGIC:
+                    logger.error(f"{self.path} is not a definitions file")
+                    return False
+                self.count = count
+                self._data_start = HEADER.size + (count + 1) * ENTRY.size
+                self._view = memoryview(mapped)
+                logger.info(f"Mapped {count} definitions from {self.path}")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to load definitions: {str(e)}")
+                return False
+
+    def _entry(self, i):
+        return ENTRY.unpack_from(self._view, HEADER.size + i * ENTRY.size)
+
+    def get(self, word):
+        """Definition text for word, or None if it is not in the store"""
+        if not word or not self.load():
+            return None
+
+        key = word.lower().encode("utf-8")
+        view = self._view
+        start = self._data_start
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key_offset, value_offset = self._entry(mid)
+            candidate = view[start + key_offset:start + value_offset]
+            if candidate == key:
+                next_key_offset, _ = self._entry(mid + 1)
+                return bytes(view[start + value_offset:start + next_key_offset]).decode("utf-8")
+            if bytes(candidate) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
@@ -0,0 +1,48 @@
+"""
+Chain length and hints-used histograms of completed games, per puzzle.
+
+Values are small integers, so an exact histogram with a capped top bucket is
+both smaller and more precise than a quantile sketch. Each player counts once
+per puzzle, with their first completed game: record_puzzle_results adds the
+buckets the stats buffer computes here to the puzzle_distributions table;
+summarize() turns the rows into counts, cumulative fractions and
+percentiles for /api/puzzle-stats/<id>.
+"""
+
+# Metric -> largest value kept as its own bucket; larger values count towards it ("25+")
+BUCKET_CAPS = {"chain_length": 25, "hints_used": 10}
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+def bucket(metric, value):
+    """The histogram bucket a value falls in"""
+    return min(max(int(value), 0), BUCKET_CAPS[metric])
+
+def summarize(rows):
+    """Turn (metric, value, count) rows into per-metric counts, cumulative fractions and percentiles"""
+    counts = {metric: {} for metric in BUCKET_CAPS}
+    for row in rows:
+        if row["metric"] in counts and row["count"] > 0:
+            counts[row["metric"]][row["value"]] = counts[row["metric"]].get(row["value"], 0) + row["count"]
+
+    summary = {}
+    for metric, by_value in counts.items():
+        total = sum(by_value.values())
+        cumulative = {}
+        percentiles = {}
+        running = 0
+        for value in sorted(by_value):
+            running += by_value[value]
+            cumulative[str(value)] = round(running / total, 4)
+            for p in PERCENTILES:
+                if f"p{p}" not in percentiles and running >= total * p / 100:
+                    percentiles[f"p{p}"] = value
+        summary[metric] = {
+            "total": total,
+            "counts": {str(value): by_value[value] for value in sorted(by_value)},
+            # Fraction of games at or below each value, so a player's rank is one lookup
+            "cumulative": cumulative,
+            "percentiles": percentiles,
+            "capped_at": BUCKET_CAPS[metric],
+        }
+    return summary
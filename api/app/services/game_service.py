@@ -1,13 +1,68 @@
 from flask import jsonify
-from datetime import datetime
+from datetime import datetime, timedelta
 import random
 import os
+import time
 import logging
-from ..models.supabase_config import get_puzzles
+import uuid
+import json
+import base64
+from ..models.supabase_config import (get_puzzles, get_scheduled_puzzle, get_puzzle_distribution, get_puzzle,
+                                     list_puzzle_page, verify_access_token, is_stored_puzzle,
+                                     get_unreleased_puzzle_ids)
 from ..config import Config
+from .similarity_service import SimilarityService, SIMILARITY_THRESHOLD
+from .suggest_service import SuggestService
+from .definition_store import DefinitionStore
+from .cache import LRUCache
+from .payloads import PreparedPayload
+from .stats_buffer import stats_buffer
+from .distributions import summarize
+from ..metrics import track_upstream
+from ..admission import Overloaded
 
 logger = logging.getLogger(__name__)
 
+# Limits for /api/suggest and /api/define
+MAX_WORD_LENGTH = 30
+MAX_SUGGESTIONS = 20
+
+# Page sizes for the puzzle archive
+DEFAULT_ARCHIVE_PAGE = 20
+MAX_ARCHIVE_PAGE = 100
+
+def format_puzzle(puzzle, source):
+    """Puzzle row as the JSON the game client expects"""
+    # Ensure definitions have proper line breaks
+    start_definition = puzzle["start_definition"].replace(". ", ".\n")
+    end_definition = puzzle["end_definition"].replace(". ", ".\n")
+    
+    return {
+        "startWord": puzzle["start_word"],
+        "endWord": puzzle["end_word"],
+        "startDefinition": start_definition,
+        "endDefinition": end_definition,
+        "source": source
+    }
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def encode_cursor(puzzle):
+    """Opaque archive cursor for the page after this puzzle summary"""
+    raw = json.dumps([puzzle["created_at"], puzzle["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """(created_at, id) from encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        created_at, puzzle_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        # created_at ends up inside a PostgREST filter string, so it must be a real timestamp
+        datetime.fromisoformat(created_at)
+        return created_at, str(uuid.UUID(puzzle_id))
+    except (TypeError, ValueError, AttributeError) as e:
+        raise ValueError("Invalid cursor") from e
+
 class GameService:
     def __init__(self):
         # Default puzzle in case of database issues
@@ -17,58 +72,298 @@ class GameService:
             "startDefinition": "Having a low temperature.\nLacking affection or warmth of feeling.",
             "endDefinition": "Having or giving out a moderate degree of heat.\nCharacterized by lively or excited activity."
         }
+        self.similarity = SimilarityService()
+        self.suggestions = SuggestService(self.similarity)
+        self.definitions = DefinitionStore()
+        # Successful HF Space responses, keyed by the lowercased word pair
+        self.similarity_cache = LRUCache("similarity", max_size=20000)
+        self.hint_cache = LRUCache("hint", max_size=5000)
+        # Serialized hint responses, which are large because of all_top_candidates
+        self.hint_payloads = LRUCache("hint_payload", max_size=1000)
+        # Serialized per-puzzle chain length distributions, refreshed after DISTRIBUTION_CACHE_TTL
+        self.distribution_payloads = LRUCache("distribution", max_size=256, ttl=Config.DISTRIBUTION_CACHE_TTL)
+        # (date, puzzle, monotonic time it was last checked, datetime it became current here),
+        # dropped when the daily puzzle rotates in this process and rechecked after DAILY_PUZZLE_TTL
+        self._daily = (None, None, 0.0, None)
+        # (puzzle, PreparedPayload) for the daily puzzle response
+        self._daily_payload = (None, None)
+
+    def fetch_similarity(self, word1, word2):
+        """Return (status_code, result) from the HF Space check-similarity endpoint, caching successes"""
+        import requests
+        
+        key = (word1.lower(), word2.lower())
+        cached = self.similarity_cache.get(key)
+        if cached is not None:
+            return 200, cached
+        
+        # Get the Hugging Face space URL from config
+        hf_space_url = Config.HF_SPACE_URL
+        with track_upstream("hf", "check-similarity"):
+            response = requests.get(
+                f"{hf_space_url}/check-similarity",
+                params={"word1": word1, "word2": word2},
+                timeout=Config.HF_TIMEOUT
+            )
+        
+        result = response.json()
+        if response.status_code == 200:
+            self.similarity_cache.set(key, result)
+        return response.status_code, result
+
+    def fetch_hint(self, current_word, target_word):
+        """Return (status_code, result) from the HF Space hint endpoint, caching successes"""
+        import requests
+        
+        key = (current_word.lower(), target_word.lower())
+        cached = self.hint_cache.get(key)
+        if cached is not None:
+            return 200, cached
+        
+        # Get the Hugging Face space URL from config
+        hf_space_url = Config.HF_SPACE_URL
+        with track_upstream("hf", "hint"):
+            response = requests.get(
+                f"{hf_space_url}/hint",
+                params={
+                    "current_word": current_word, 
+                    "target_word": target_word,
+                    "threshold": SIMILARITY_THRESHOLD  # Use the new threshold for finding hints
+                },
+                timeout=Config.HF_TIMEOUT
+            )
+        
+        result = response.json()
+        if response.status_code == 200:
+            self.hint_cache.set(key, result)
+        return response.status_code, result
+
+    def prepare_target(self, target_word):
+        """Precompute similarities to the puzzle's end word without failing the request"""
+        try:
+            self.similarity.set_target(target_word)
+        except Exception as e:
+            logger.error(f"Error precomputing target similarities: {str(e)}")
+
+    def warm_up(self, puzzle, neighbor_count=10):
+        """
+        Precompute data for an upcoming puzzle: its target vector (staged, not yet current)
+        and the similarity and hint results for the start word's nearest neighbors.
+        Returns counts of what was warmed.
+        """
+        start_word = puzzle["start_word"]
+        end_word = puzzle["end_word"]
+        counts = {"target_vectors": 0, "neighbors": 0, "similarities": 0, "hints": 0, "errors": 0}
+        
+        if self.similarity.stage_target(end_word):
+            counts["target_vectors"] = 1
+        
+        # The likeliest first guesses are the start word's nearest neighbors
+        neighbors = self.similarity.nearest_neighbors(start_word, neighbor_count)
+        counts["neighbors"] = len(neighbors)
+        
+        for word in neighbors:
+            try:
+                status_code, _ = self.fetch_similarity(start_word, word)
+                counts["similarities" if status_code == 200 else "errors"] += 1
+            except Exception as e:
+                logger.warning(f"Failed to warm similarity {start_word} -> {word}: {str(e)}")
+                counts["errors"] += 1
+        
+        for word in [start_word] + neighbors:
+            try:
+                status_code, _ = self.fetch_hint(word, end_word)
+                counts["hints" if status_code == 200 else "errors"] += 1
+            except Exception as e:
+                logger.warning(f"Failed to warm hint {word} -> {end_word}: {str(e)}")
+                counts["errors"] += 1
+        
+        return counts
+
+    def select_daily_puzzle(self):
+        """Return today's puzzle row from Supabase, or None if there are no puzzles"""
+        # Prefer the puzzle scheduled for today's date
+        puzzle = get_scheduled_puzzle()
+        if puzzle:
+            logger.info("Using puzzle scheduled for today")
+            self.prepare_target(puzzle["end_word"])
+            return puzzle
+
+        puzzles = get_puzzles()
+        if not puzzles:
+            return None
+
+        # First, try to find a puzzle marked as daily
+        daily_puzzles = [p for p in puzzles if p.get('is_daily', False)]
+        
+        if daily_puzzles:
+            # Use the first puzzle marked as daily
+            puzzle = daily_puzzles[0]
+            logger.info("Using puzzle marked as daily")
+        else:
+            # Fallback to random selection if no puzzle is marked as daily
+            logger.info("No puzzle marked as daily, using random selection")
+            today = datetime.now().date()
+            random.seed(int(today.strftime('%Y%m%d')))
+            puzzle = random.choice(puzzles)
+        
+        self.prepare_target(puzzle["end_word"])
+        return puzzle
+
+    def get_cached_daily_puzzle(self):
+        """
+        Return today's puzzle, selecting it again every DAILY_PUZZLE_TTL seconds so a
+        rotation made by another process shows up here too. Only rows that came from
+        Supabase or the replica are cached; mock data after a failed read never is.
+        """
+        now = datetime.now()
+        today = now.date()
+        day, puzzle, checked_at, modified = self._daily
+        if day == today and puzzle and time.monotonic() - checked_at < Config.DAILY_PUZZLE_TTL:
+            return puzzle
+        
+        try:
+            selected = self.select_daily_puzzle()
+        except Overloaded:
+            if day == today and puzzle:
+                # Shed on a recheck: today's puzzle is still good, try again after the TTL
+                self._daily = (day, puzzle, time.monotonic(), modified)
+                return puzzle
+            raise
+        if not is_stored_puzzle(selected):
+            if day == today and puzzle:
+                # Keep today's real puzzle through a failed recheck, and retry after the TTL
+                self._daily = (day, puzzle, time.monotonic(), modified)
+                return puzzle
+            return selected
+        
+        if day != today or not puzzle or puzzle.get("id") != selected.get("id"):
+            # Truncated to whole seconds, the precision of Last-Modified
+            modified = now.replace(microsecond=0)
+        self._daily = (today, selected, time.monotonic(), modified)
+        return selected
+
+    def invalidate_daily(self):
+        """Forget the cached daily puzzle so the next request selects it again"""
+        self._daily = (None, None, 0.0, None)
+        self._daily_payload = (None, None)
+
+    def preload(self):
+        """Load the read-only word data now (embeddings, suggestion index, definitions) instead of on first use"""
+        return {
+            "similarity": self.similarity.load(),
+            "suggestions": self.suggestions.load(),
+            "definitions": self.definitions.load(),
+        }
+
+    def export_state(self, max_entries):
+        """Today's puzzle and the most recently used similarity and hint results, for a snapshot"""
+        day, puzzle, _, modified = self._daily
+        return {
+            "daily": {
+                "date": day.isoformat(),
+                "puzzle": puzzle,
+                "modified": modified.isoformat() if modified else None,
+            } if day and puzzle else None,
+            "caches": {
+                cache.name: [[list(key), value] for key, value in cache.items()[-max_entries:]]
+                for cache in (self.similarity_cache, self.hint_cache)
+            },
+        }
+
+    def restore_state(self, state, restore_daily=True):
+        """Load a snapshot from export_state; returns counts of restored entries"""
+        counts = {"daily": 0}
+        for cache in (self.similarity_cache, self.hint_cache):
+            entries = state.get("caches", {}).get(cache.name, [])
+            # Oldest first, so the snapshot's recency order is kept
+            for key, value in entries:
+                cache.set(tuple(key), value)
+            counts[cache.name] = len(entries)
+        
+        daily = state.get("daily")
+        today = datetime.now().date()
+        if restore_daily and daily and daily.get("date") == today.isoformat() and self._daily[0] != today:
+            # The puzzle was current when the snapshot was saved, so trust it for what is left
+            # of DAILY_PUZZLE_TTL since then; an older snapshot is rechecked on the next request
+            age = time.time() - state.get("created_at", 0)
+            checked_at = time.monotonic() - age if 0 <= age < Config.DAILY_PUZZLE_TTL else 0.0
+            modified = daily.get("modified")
+            modified = datetime.fromisoformat(modified) if modified else datetime.combine(today, datetime.min.time())
+            self._daily = (today, daily["puzzle"], checked_at, modified)
+            self.prepare_target(daily["puzzle"]["end_word"])
+            counts["daily"] = 1
+        return counts
+
+    def get_daily_payload(self, puzzle):
+        """The daily puzzle response body, serialized and compressed once per puzzle"""
+        cached_puzzle, payload = self._daily_payload
+        if cached_puzzle is puzzle:
+            return payload
+        
+        payload = PreparedPayload(format_puzzle(puzzle, "database"))
+        self._daily_payload = (puzzle, payload)
+        return payload
+
+    def set_daily_cache_headers(self, response, puzzle):
+        """
+        Add a strong ETag and cache headers. A rotation can happen mid-day and reaches
+        every process within DAILY_PUZZLE_TTL, so no cache may keep the response longer.
+        """
+        now = datetime.now()
+        today = now.date()
+        next_midnight = datetime.combine(today + timedelta(days=1), datetime.min.time())
+        seconds_until_rollover = max(int((next_midnight - now).total_seconds()), 1)
+        
+        puzzle_key = puzzle.get("id") or f"{puzzle['start_word']}-{puzzle['end_word']}"
+        # Each Content-Encoding is a different representation, so it gets its own tag
+        encoding = response.headers.get("Content-Encoding")
+        response.set_etag(f"{puzzle_key}-{today.isoformat()}" + (f"-{encoding}" if encoding else ""))
+        # When this process first served the puzzle; never before the rotation that made it current
+        modified = self._daily[3] if self._daily[1] is puzzle else None
+        response.last_modified = (modified or now.replace(microsecond=0)).astimezone()
+        lifetime = min(Config.DAILY_PUZZLE_TTL, seconds_until_rollover)
+        response.headers["Cache-Control"] = f"public, max-age={lifetime}, s-maxage={lifetime}"
+        return response
 
     def get_daily_puzzle(self):
         """Get today's puzzle from Supabase or fallback to default"""
         try:
-            # Try to get puzzles from database
-            puzzles = get_puzzles()
-            if puzzles:
-                # First, try to find a puzzle marked as daily
-                daily_puzzles = [p for p in puzzles if p.get('is_daily', False)]
-                
-                if daily_puzzles:
-                    # Use the first puzzle marked as daily
-                    puzzle = daily_puzzles[0]
-                    logger.info("Using puzzle marked as daily")
-                else:
-                    # Fallback to random selection if no puzzle is marked as daily
-                    logger.info("No puzzle marked as daily, using random selection")
-                    today = datetime.now().date()
-                    random.seed(int(today.strftime('%Y%m%d')))
-                    puzzle = random.choice(puzzles)
-                
-                # Ensure definitions have proper line breaks
-                start_definition = puzzle["start_definition"].replace(". ", ".\n")
-                end_definition = puzzle["end_definition"].replace(". ", ".\n")
-                
-                return jsonify({
-                    "startWord": puzzle["start_word"],
-                    "endWord": puzzle["end_word"],
-                    "startDefinition": start_definition,
-                    "endDefinition": end_definition,
-                    "source": "database"
-                })
+            # Try to get the daily puzzle from database
+            puzzle = self.get_cached_daily_puzzle()
+            if is_stored_puzzle(puzzle):
+                response = self.get_daily_payload(puzzle).response()
+                return self.set_daily_cache_headers(response, puzzle)
+            if puzzle:
+                # Mock data (development, or Supabase failing with no replica) is never cached
+                response = jsonify(format_puzzle(puzzle, "default"))
+                response.headers["Cache-Control"] = "no-cache"
+                return response
             
             # Log warning and use default puzzle if database is empty
             logger.warning("No puzzles found in database, using default puzzle")
-            return jsonify({**self.default_puzzle, "source": "default"})
+            response = jsonify({**self.default_puzzle, "source": "default"})
+            response.headers["Cache-Control"] = "no-cache"
+            return response
             
+        except Overloaded:
+            # A 503 with Retry-After, not the default puzzle
+            raise
         except Exception as e:
             # Log the full error for debugging
             logger.error(f"Error fetching puzzle: {str(e)}")
             
             # Return default puzzle with error indication
-            return jsonify({
+            response = jsonify({
                 **self.default_puzzle,
                 "source": "default",
                 "note": "Using default puzzle due to technical difficulties"
             })
+            response.headers["Cache-Control"] = "no-cache"
+            return response
 
     def validate_word(self, data):
         """Validate if the word can be used in the current chain"""
-        import requests
-        
         # Handle case where data might be None or not a dict
         if not data or not isinstance(data, dict):
             logger.error(f"Invalid data format received: {data}")
@@ -93,23 +388,16 @@ class GameService:
             return jsonify({"error": "Missing words"}), 400
             
         try:
-            # Get the Hugging Face space URL from config
-            hf_space_url = Config.HF_SPACE_URL
-            response = requests.get(
-                f"{hf_space_url}/check-similarity",
-                params={"word1": word1, "word2": word2}
-            )
+            status_code, result = self.fetch_similarity(word1, word2)
             
-            if response.status_code == 200:
-                result = response.json()
-                
+            if status_code == 200:
                 # Check if the API returned a valid field
                 if "valid" in result:
                     is_valid = result["valid"]
                 else:
                     # If not, calculate it based on similarity threshold
                     similarity = result["similarity"]
-                    is_valid = similarity > 0.47
+                    is_valid = similarity > SIMILARITY_THRESHOLD
                 
                 # Check if there's an error message
                 message = result.get("message", None)
@@ -119,52 +407,56 @@ class GameService:
                     "similarity": result["similarity"]
                 }
                 
+                # Closeness to the daily end word, looked up from the precomputed vector
+                if self.similarity.get_target_word() is None and self.similarity.is_available():
+                    self.get_cached_daily_puzzle()
+                target_similarity = self.similarity.target_similarity(word2, data.get('target_word'))
+                if target_similarity is not None:
+                    response_data["target_similarity"] = target_similarity
+                
                 # Add message if present
                 if message:
                     response_data["message"] = message
                     
                 return jsonify(response_data)
             else:
-                return jsonify({"error": response.json().get("detail", "Unknown error")}), response.status_code
+                return jsonify({"error": result.get("detail", "Unknown error")}), status_code
                 
+        except Overloaded:
+            raise
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
     def get_hint(self, data):
         """Get hint for the current word chain"""
-        import requests
-        
         current_word = data.get('current_word')
         target_word = data.get('target_word')
         
         if not current_word or not target_word:
             return jsonify({"error": "Missing current_word or target_word"}), 400
             
+        key = (current_word.lower(), target_word.lower())
+        payload = self.hint_payloads.get(key)
+        if payload is not None:
+            return payload.response()
+            
         try:
-            # Get the Hugging Face space URL from config
-            hf_space_url = Config.HF_SPACE_URL
-            response = requests.get(
-                f"{hf_space_url}/hint",
-                params={
-                    "current_word": current_word, 
-                    "target_word": target_word,
-                    "threshold": 0.47  # Use the new threshold for finding hints
-                }
-            )
+            status_code, result = self.fetch_hint(current_word, target_word)
             
-            if response.status_code == 200:
-                result = response.json()
-                return jsonify(result)
+            if status_code == 200:
+                payload = PreparedPayload(result)
+                self.hint_payloads.set(key, payload)
+                return payload.response()
             else:
-                return jsonify({"error": response.json().get("detail", "Unknown error")}), response.status_code
+                return jsonify({"error": result.get("detail", "Unknown error")}), status_code
                 
+        except Overloaded:
+            raise
         except Exception as e:
             return jsonify({"error": str(e)}), 500
             
     def check_similarity(self, data):
         """Check similarity between two words"""
-        import requests
-        
         word1 = data.get('word1')
         word2 = data.get('word2')
         
@@ -172,18 +464,163 @@ class GameService:
             return jsonify({"error": "Missing word1 or word2"}), 400
             
         try:
-            # Get the Hugging Face space URL from config
-            hf_space_url = Config.HF_SPACE_URL
-            response = requests.get(
-                f"{hf_space_url}/check-similarity",
-                params={"word1": word1, "word2": word2}
-            )
+            status_code, result = self.fetch_similarity(word1, word2)
             
-            if response.status_code == 200:
-                result = response.json()
+            if status_code == 200:
                 return jsonify(result)
             else:
-                return jsonify({"error": response.json().get("detail", "Unknown error")}), response.status_code
+                return jsonify({"error": result.get("detail", "Unknown error")}), status_code
                 
+        except Overloaded:
+            raise
         except Exception as e:
             return jsonify({"error": str(e)}), 500
+
+    def record_result(self, data, access_token):
+        """
+        Queue a finished game for the batched user_puzzle_stats / puzzle_stats write.
+        The user is the one the Supabase access token belongs to, never a body field.
+        """
+        user_id = verify_access_token(access_token)
+        if not user_id:
+            return jsonify({"error": "A valid access token is required"}), 401
+        
+        if not data or not isinstance(data, dict):
+            return jsonify({"error": "Invalid request format"}), 400
+        
+        try:
+            puzzle_id = str(uuid.UUID(str(data.get('puzzle_id'))))
+            user_id = str(uuid.UUID(str(user_id)))
+        except ValueError:
+            return jsonify({"error": "puzzle_id must be a UUID"}), 400
+        
+        completed = bool(data.get('completed', False))
+        chain_length = data.get('chain_length')
+        hints_used = data.get('hints_used', 0)
+        # bool is a subclass of int, so JSON true/false would otherwise pass as 1/0
+        if completed and (not _is_int(chain_length) or chain_length < 1):
+            return jsonify({"error": "chain_length must be a positive integer for a completed game"}), 400
+        if not _is_int(hints_used) or hints_used < 0:
+            return jsonify({"error": "hints_used must be a non-negative integer"}), 400
+        
+        if not stats_buffer.add(puzzle_id, user_id, chain_length, hints_used, completed):
+            return jsonify({"error": "Too many pending results, try again later"}), 503
+        return jsonify({"status": "queued"}), 202
+
+    def get_distribution(self, puzzle_id):
+        """Chain length and hints distributions for a puzzle, served from memory between refreshes"""
+        try:
+            puzzle_id = str(uuid.UUID(puzzle_id))
+        except ValueError:
+            return jsonify({"error": "puzzle_id must be a UUID"}), 400
+        
+        payload = self.distribution_payloads.get(puzzle_id)
+        if payload is None:
+            rows = get_puzzle_distribution(puzzle_id)
+            if rows is None:
+                return jsonify({"error": "Puzzle statistics are unavailable"}), 503
+            payload = PreparedPayload({"puzzle_id": puzzle_id, **summarize(rows)})
+            self.distribution_payloads.set(puzzle_id, payload)
+        
+        response = payload.response()
+        response.headers["Cache-Control"] = f"public, max-age={Config.DISTRIBUTION_CACHE_TTL}"
+        return response
+
+    def suggest(self, data):
+        """Autocomplete a partly typed guess from the game vocabulary"""
+        prefix = (data.get('prefix') or '').strip().lower()
+        if not prefix or not prefix.isalpha() or len(prefix) > MAX_WORD_LENGTH:
+            return jsonify({"error": "prefix must be 1-30 letters"}), 400
+        
+        try:
+            limit = min(max(int(data.get('limit') or 10), 1), MAX_SUGGESTIONS)
+        except ValueError:
+            return jsonify({"error": "limit must be a number"}), 400
+        
+        if not self.suggestions.load():
+            return jsonify({"error": "Suggestions are unavailable"}), 503
+        
+        current_word = data.get('current_word')
+        response = jsonify({
+            "prefix": prefix,
+            "suggestions": self.suggestions.suggest(prefix, limit, current_word)
+        })
+        # The vocabulary only changes on deploy, so frequency-ranked results cache well
+        if not current_word:
+            response.headers["Cache-Control"] = "public, max-age=86400"
+        return response
+
+    def define(self, word):
+        """Precomputed definitions for a word in the game vocabulary"""
+        word = (word or '').strip().lower()
+        if not word or not word.isalpha() or len(word) > MAX_WORD_LENGTH:
+            return jsonify({"error": "word must be 1-30 letters"}), 400
+        
+        if not self.definitions.load():
+            return jsonify({"error": "Definitions are unavailable"}), 503
+        
+        definition = self.definitions.get(word)
+        if definition is None:
+            response = jsonify({"error": f"No definition found for '{word}'"})
+            response.status_code = 404
+        else:
+            response = jsonify({"word": word, "definition": definition})
+        # Definitions only change when the file is rebuilt on deploy
+        response.headers["Cache-Control"] = "public, max-age=86400, s-maxage=604800"
+        return response
+
+    def list_archive(self, data):
+        """A page of past puzzle summaries, newest first, for practice mode"""
+        try:
+            limit = min(max(int(data.get('limit') or DEFAULT_ARCHIVE_PAGE), 1), MAX_ARCHIVE_PAGE)
+        except ValueError:
+            return jsonify({"error": "limit must be a number"}), 400
+        
+        before = None
+        if data.get('cursor'):
+            try:
+                before = decode_cursor(data['cursor'])
+            except ValueError:
+                return jsonify({"error": "Invalid cursor"}), 400
+        
+        # One extra row tells us whether there is a next page
+        rows = list_puzzle_page(limit + 1, before)
+        if rows is None:
+            return jsonify({"error": "Puzzle archive is unavailable"}), 503
+        
+        page = rows[:limit]
+        response = jsonify({
+            "puzzles": [{
+                "id": p["id"],
+                "startWord": p["start_word"],
+                "endWord": p["end_word"],
+                "difficulty": p.get("difficulty"),
+                "createdAt": p["created_at"]
+            } for p in page],
+            "next_cursor": encode_cursor(page[-1]) if len(rows) > limit else None
+        })
+        response.headers["Cache-Control"] = "public, max-age=60"
+        return response
+
+    def get_practice_puzzle(self, puzzle_id):
+        """A single archived puzzle by id, in the same shape as the daily puzzle"""
+        try:
+            puzzle_id = str(uuid.UUID(puzzle_id))
+        except ValueError:
+            return jsonify({"error": "puzzle_id must be a UUID"}), 400
+        
+        unreleased = get_unreleased_puzzle_ids()
+        if unreleased is None:
+            return jsonify({"error": "Puzzle archive is unavailable"}), 503
+        
+        puzzle = get_puzzle(puzzle_id)
+        # Today's and upcoming puzzles are not in the archive; answer as if they didn't exist
+        daily = self.get_cached_daily_puzzle()
+        if (not puzzle or puzzle_id in unreleased or puzzle.get("is_daily")
+                or (is_stored_puzzle(daily) and daily.get("id") == puzzle_id)):
+            return jsonify({"error": "Puzzle not found"}), 404
+        
+        response = jsonify({**format_puzzle(puzzle, "archive"), "id": puzzle["id"]})
+        # A puzzle's words and definitions don't change once generated
+        response.headers["Cache-Control"] = "public, max-age=86400"
+        return response
@@ -2,6 +2,7 @@ import os
 from typing import List, Optional
 import openai
 from datetime import datetime
+from ..metrics import track_upstream
 
 # Configure OpenAI (can be easily swapped with another provider)
 openai.api_key = os.environ.get("OPENAI_API_KEY")
@@ -40,18 +41,19 @@ class HintGenerator:
         """
         
         try:
-            response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=[{
-                    "role": "system",
-                    "content": "You are a helpful assistant for a word chain game."
-                }, {
-                    "role": "user",
-                    "content": prompt
-                }],
-                temperature=0.7,
-                max_tokens=100
-            )
+            with track_upstream("openai", "chat_completion"):
+                response = openai.ChatCompletion.create(
+                    model=self.model,
+                    messages=[{
+                        "role": "system",
+                        "content": "You are a helpful assistant for a word chain game."
+                    }, {
+                        "role": "user",
+                        "content": prompt
+                    }],
+                    temperature=0.7,
+                    max_tokens=100
+                )
             return response.choices[0].message.content.strip()
         except Exception as e:
             return f"Sorry, I couldn't generate a hint right now. Try thinking of words related to both {current_word} and {target_word}."
@@ -76,18 +78,19 @@ class HintGenerator:
         """
         
         try:
-            response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=[{
-                    "role": "system",
-                    "content": "You are a helpful assistant explaining semantic relationships between words."
-                }, {
-                    "role": "user",
-                    "content": prompt
-                }],
-                temperature=0.7,
-                max_tokens=100
-            )
+            with track_upstream("openai", "chat_completion"):
+                response = openai.ChatCompletion.create(
+                    model=self.model,
+                    messages=[{
+                        "role": "system",
+                        "content": "You are a helpful assistant explaining semantic relationships between words."
+                    }, {
+                        "role": "user",
+                        "content": prompt
+                    }],
+                    temperature=0.7,
+                    max_tokens=100
+                )
             return response.choices[0].message.content.strip()
         except Exception as e:
             return f"These words are {similarity:.1f}% similar in meaning."
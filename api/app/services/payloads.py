@@ -0,0 +1,49 @@
+"""
+Pre-serialized JSON response bodies for payloads that are reused across many requests.
+
+A PreparedPayload serializes once and keeps gzip (and brotli, if installed)
+variants next to the plain bytes, so serving it is a header negotiation and a
+bytes copy instead of a dict build, a jsonify and a compression per request.
+"""
+
+import gzip
+import json
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; the headers would outweigh the savings
+MIN_COMPRESS_SIZE = 256
+
+class PreparedPayload:
+    __slots__ = ("data", "bodies")
+
+    def __init__(self, data):
+        self.data = data
+        body = json.dumps(data, separators=(",", ":"), sort_keys=True).encode("utf-8") + b"\n"
+        self.bodies = {"identity": body}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            compressed = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed["br"] = brotli.compress(body, quality=11)
+            # Only keep variants that are actually smaller
+            self.bodies.update({name: value for name, value in compressed.items() if len(value) < len(body)})
+
+    def encoding_for(self, accept_encodings):
+        """Best available encoding for an Accept-Encoding header, preferring the smallest body"""
+        candidates = sorted((name for name in self.bodies if name != "identity"), key=lambda name: len(self.bodies[name]))
+        return accept_encodings.best_match(candidates) or "identity"
+
+    def response(self, status=200):
+        """Response with the best variant for the current request"""
+        encoding = self.encoding_for(request.accept_encodings)
+        response = Response(self.bodies[encoding], status=status, mimetype="application/json")
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+        if len(self.bodies) > 1:
+            response.vary.add("Accept-Encoding")
+        return response
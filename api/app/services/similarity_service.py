@@ -0,0 +1,246 @@
+import os
+import json
+import threading
+import logging
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+# Rows per block when scoring a quantized matrix, bounding the float32 scratch space
+SCORE_BLOCK_ROWS = 65536
+
+QUANTIZED_DTYPES = ("float16", "int8")
+
+# Cosine similarity above which two words may be chained
+SIMILARITY_THRESHOLD = 0.47
+
+def write_embeddings(path, vocab, matrix, dtype="float16", source=None):
+    """
+    Write matrix rows, normalized to unit length, as a float16 or int8 .npy with
+    the "<name>.vocab" and "<name>.json" sidecars SimilarityService loads.
+    int8 uses one symmetric scale for the whole matrix. Returns (stored, scale).
+    """
+    import numpy as np
+
+    if dtype not in QUANTIZED_DTYPES:
+        raise ValueError(f"dtype must be one of {', '.join(QUANTIZED_DTYPES)}")
+
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix = matrix / norms
+
+    scale = 1.0
+    if dtype == "int8":
+        scale = float(np.abs(matrix).max()) / 127 or 1.0
+        stored = np.clip(np.rint(matrix / scale), -127, 127).astype(np.int8)
+    else:
+        stored = matrix.astype(np.float16)
+
+    base = os.path.splitext(path)[0]
+    meta = {"dtype": dtype, "scale": scale, "normalized": True, "rows": len(vocab),
+            "dimensions": int(matrix.shape[1]), "source": source}
+    for target, write in (
+        (path, lambda f: np.save(f, stored)),
+        (base + ".vocab", lambda f: f.write("".join(f"{word}\n" for word in vocab).encode("utf-8"))),
+        (base + ".json", lambda f: f.write(json.dumps(meta, indent=2).encode("utf-8"))),
+    ):
+        with open(f"{target}.tmp", "wb") as f:
+            write(f)
+        os.replace(f"{target}.tmp", target)
+    return stored, scale
+
+class SimilarityService:
+    """
+    Local similarity lookups backed by an embedding matrix for the game vocabulary.
+
+    The matrix is a .npy file with one row per word and a sidecar "<name>.vocab"
+    file listing the words in row order. Nothing is loaded unless EMBEDDINGS_PATH
+    is configured, so the API keeps working with only the HF Space.
+
+    Matrices written by scripts/build_embeddings.py are float16 or int8 with a
+    "<name>.json" sidecar giving the dtype and int8 scale; they are pre-normalized
+    and scored in blocks, so the mapped file is never copied to float32 whole.
+    """
+
+    def __init__(self, embeddings_path=None):
+        self.embeddings_path = embeddings_path if embeddings_path is not None else Config.EMBEDDINGS_PATH
+        self.matrix = None
+        self.vocab = []
+        self.word_index = {}
+        # Multiplier turning raw row values back into unit-length components (int8 only)
+        self.scale = 1.0
+        # (target_word, similarity vector) swapped in as a single reference
+        self._target = (None, None)
+        # Target computed ahead of rollover, swapped in by set_target
+        self._staged = (None, None)
+        self._lock = threading.Lock()
+        self._load_attempted = False
+
+    def load(self):
+        """Load the embedding matrix and vocabulary index once; return True if available"""
+        if self._load_attempted:
+            return self.matrix is not None
+
+        with self._lock:
+            if self._load_attempted:
+                return self.matrix is not None
+            self._load_attempted = True
+
+            if not self.embeddings_path:
+                return False
+
+            vocab_path = os.path.splitext(self.embeddings_path)[0] + ".vocab"
+            if not os.path.exists(self.embeddings_path) or not os.path.exists(vocab_path):
+                logger.warning(f"Embedding files not found at {self.embeddings_path}, local similarity disabled")
+                return False
+
+            try:
+                import numpy as np
+
+                matrix = np.load(self.embeddings_path, mmap_mode="r")
+                with open(vocab_path, encoding="utf-8") as f:
+                    vocab = [line.strip() for line in f if line.strip()]
+
+                if len(vocab) != matrix.shape[0]:
+                    logger.error(f"Vocabulary size {len(vocab)} does not match matrix rows {matrix.shape[0]}")
+                    return False
+
+                meta_path = os.path.splitext(self.embeddings_path)[0] + ".json"
+                meta = {}
+                if os.path.exists(meta_path):
+                    with open(meta_path, encoding="utf-8") as f:
+                        meta = json.load(f)
+                if meta.get("dtype", str(matrix.dtype)) != str(matrix.dtype):
+                    logger.error(f"{meta_path} describes a {meta['dtype']} matrix but {self.embeddings_path} is {matrix.dtype}")
+                    return False
+                scale = float(meta.get("scale", 1.0))
+
+                # Rows must be unit length so a dot product is the cosine similarity
+                norms = np.linalg.norm(np.asarray(matrix[:min(len(vocab), 1000)], dtype=np.float32), axis=1) * scale
+                if not meta.get("normalized") and not np.allclose(norms[norms > 0], 1.0, atol=1e-3):
+                    matrix = np.asarray(matrix, dtype=np.float32)
+                    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                    norms[norms == 0] = 1.0
+                    matrix = matrix / norms
+                    scale = 1.0
+
+                self.scale = scale
+                self.word_index = {word: i for i, word in enumerate(vocab)}
+                self.vocab = vocab
+                self.matrix = matrix
+                logger.info(f"Loaded embedding matrix with {len(vocab)} words from {self.embeddings_path}")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to load embedding matrix: {str(e)}")
+                return False
+
+    def is_available(self):
+        return self.load()
+
+    def _row(self, index):
+        import numpy as np
+        return np.asarray(self.matrix[index], dtype=np.float32) * self.scale
+
+    def _scores(self, index):
+        """Similarity of every vocabulary word to the word at index"""
+        import numpy as np
+
+        matrix = self.matrix
+        # Folding the matrix scale into the query keeps the blocks raw
+        vector = self._row(index) * self.scale
+        if matrix.dtype == np.float32:
+            return np.asarray(matrix @ vector, dtype=np.float32)
+
+        scores = np.empty(matrix.shape[0], dtype=np.float32)
+        for start in range(0, matrix.shape[0], SCORE_BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            np.matmul(block, vector, out=scores[start:start + len(block)])
+        return scores
+
+    def compute_target(self, target_word):
+        """Return (target_word, vector) with every vocabulary word's similarity to the target"""
+        target_word = target_word.lower()
+        index = self.word_index.get(target_word)
+        if index is None:
+            logger.warning(f"Target word '{target_word}' is not in the embedding vocabulary")
+            return (target_word, None)
+
+        # One matrix-vector product over the whole vocabulary
+        vector = self._scores(index)
+        logger.info(f"Precomputed target similarities for '{target_word}' over {len(vector)} words")
+        return (target_word, vector)
+
+    def stage_target(self, target_word):
+        """Precompute the target vector for an upcoming puzzle without making it current"""
+        if not target_word or not self.load():
+            return False
+        self._staged = self.compute_target(target_word)
+        return self._staged[1] is not None
+
+    def set_target(self, target_word):
+        """Make target_word the current target, reusing a staged vector when there is one"""
+        if not target_word or not self.load():
+            return False
+
+        target_word = target_word.lower()
+        if self._target[0] == target_word:
+            return self._target[1] is not None
+
+        if self._staged[0] == target_word:
+            self._target = self._staged
+        else:
+            self._target = self.compute_target(target_word)
+        return self._target[1] is not None
+
+    def nearest_neighbors(self, word, count=10):
+        """Return up to count vocabulary words most similar to word, best first"""
+        if not word or not self.load():
+            return []
+
+        index = self.word_index.get(word.lower())
+        if index is None:
+            return []
+
+        import numpy as np
+
+        scores = self._scores(index)
+        scores[index] = -np.inf
+        count = min(count, len(scores) - 1)
+        if count <= 0:
+            return []
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top])]
+        return [self.vocab[i] for i in top]
+
+    def get_target_word(self):
+        return self._target[0]
+
+    def target_similarity(self, word, target_word=None):
+        """Similarity of word to the prepared target, or None if it is not known"""
+        current_target, vector = self._target
+        if vector is None or not word:
+            return None
+        if target_word and target_word.lower() != current_target:
+            return None
+
+        index = self.word_index.get(word.lower())
+        if index is None:
+            return None
+        return float(vector[index])
+
+    def similarities(self, word, candidates):
+        """Similarity of word to each candidate, with None where either is not in the vocabulary"""
+        if not word or not candidates or not self.load():
+            return [None] * len(candidates)
+
+        index = self.word_index.get(word.lower())
+        if index is None:
+            return [None] * len(candidates)
+
+        rows = [self.word_index.get(candidate) for candidate in candidates]
+        known = [row for row in rows if row is not None]
+        if not known:
+            return [None] * len(candidates)
+        scores = iter(self._row(known) @ self._row(index))
+        return [float(next(scores)) if row is not None else None for row in rows]
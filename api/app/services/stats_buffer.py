@@ -0,0 +1,156 @@
+"""
+Write-behind buffer for game results.
+
+Submissions are merged in memory per (puzzle_id, user_id) and flushed by a
+background thread as one record_puzzle_results call, every
+STATS_FLUSH_INTERVAL seconds or sooner once STATS_FLUSH_SIZE entries are
+pending. The database then applies one puzzle_stats delta per puzzle per
+flush, rather than one per game. Each entry also carries the histogram
+buckets of its first completed game; the same call adds them to the
+per-puzzle histograms only when the player had not completed the puzzle
+before, so re-submissions are not counted twice. What is still pending is
+flushed at process exit.
+A failed flush is merged back and retried on the next one. Once
+STATS_MAX_PENDING entries are waiting, new results are dropped and counted.
+"""
+
+import atexit
+import logging
+import os
+import threading
+
+from ..config import Config
+from ..metrics import register_collector
+from ..models.supabase_config import record_puzzle_results
+from .distributions import bucket
+
+logger = logging.getLogger(__name__)
+
+def _merge(entry, other):
+    """Combine two aggregated results for the same puzzle and user"""
+    entry["attempts"] += other["attempts"]
+    entry["completions"] += other["completions"]
+    entry["hints_used"] += other["hints_used"]
+    entry["chain_total"] += other["chain_total"]
+    chains = [c for c in (entry["best_chain_length"], other["best_chain_length"]) if c is not None]
+    entry["best_chain_length"] = min(chains) if chains else None
+    # entry is the earlier of the two; only its first completed game goes in the histograms
+    if entry["chain_length_bucket"] is None:
+        entry["chain_length_bucket"] = other["chain_length_bucket"]
+        entry["hints_used_bucket"] = other["hints_used_bucket"]
+
+class StatsBuffer:
+    def __init__(self, writer, flush_interval, flush_size, max_pending):
+        self.writer = writer
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.max_pending = max_pending
+        self.flushed = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher_pid = None
+
+    def add(self, puzzle_id, user_id, chain_length=None, hints_used=0, completed=False):
+        """Queue one finished game; returns False if the buffer is full and it was dropped"""
+        self._start_flusher()
+        result = {
+            "attempts": 1,
+            "completions": 1 if completed else 0,
+            "hints_used": hints_used,
+            "best_chain_length": chain_length if completed else None,
+            "chain_total": chain_length if completed and chain_length else 0,
+            "chain_length_bucket": bucket("chain_length", chain_length) if completed else None,
+            "hints_used_bucket": bucket("hints_used", hints_used) if completed else None,
+        }
+        key = (puzzle_id, user_id)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is not None:
+                _merge(entry, result)
+            elif len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            else:
+                self._pending[key] = result
+            pending = len(self._pending)
+        if pending >= self.flush_size:
+            self._wake.set()
+        return True
+
+    def __len__(self):
+        return len(self._pending)
+
+    def flush(self):
+        """Write everything pending in one batch; returns the number of entries written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            rows = [{"puzzle_id": puzzle_id, "user_id": user_id, **result}
+                    for (puzzle_id, user_id), result in batch.items()]
+            try:
+                self.writer(rows)
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.error(f"Failed to flush {len(rows)} puzzle results, will retry: {str(e)}")
+                self._requeue(batch)
+                return 0
+            self.flushed += len(rows)
+            return len(rows)
+
+    def _requeue(self, batch):
+        with self._lock:
+            for key, result in batch.items():
+                entry = self._pending.get(key)
+                if entry is not None:
+                    # The failed batch came first, so it leads the merge
+                    _merge(result, entry)
+                    self._pending[key] = result
+                elif len(self._pending) < self.max_pending:
+                    self._pending[key] = result
+                else:
+                    self.dropped += 1
+
+    def _start_flusher(self):
+        """Start one flush thread per worker process (after fork)"""
+        if self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+
+        def run():
+            while True:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                self.flush()
+
+        threading.Thread(target=run, daemon=True).start()
+
+stats_buffer = StatsBuffer(
+    record_puzzle_results,
+    flush_interval=Config.STATS_FLUSH_INTERVAL,
+    flush_size=Config.STATS_FLUSH_SIZE,
+    max_pending=Config.STATS_MAX_PENDING,
+)
+
+# Don't lose buffered results when a worker shuts down
+atexit.register(stats_buffer.flush)
+
+def _stats_samples():
+    return [
+        ("connectle_stats_pending", (), len(stats_buffer), "gauge"),
+        ("connectle_stats_flushed_total", (), stats_buffer.flushed, "counter"),
+        ("connectle_stats_dropped_total", (), stats_buffer.dropped, "counter"),
+        ("connectle_stats_failed_flushes_total", (), stats_buffer.failed_flushes, "counter"),
+    ]
+
+register_collector(_stats_samples, {
+    "connectle_stats_pending": ("gauge", "Game results buffered and not yet written"),
+    "connectle_stats_flushed_total": ("counter", "Aggregated game results written to the database"),
+    "connectle_stats_dropped_total": ("counter", "Game results dropped because the buffer was full"),
+    "connectle_stats_failed_flushes_total": ("counter", "Batched stats writes that failed and were retried"),
+})
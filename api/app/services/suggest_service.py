@@ -0,0 +1,119 @@
+import os
+import threading
+import logging
+from array import array
+from bisect import bisect_left
+from heapq import nlargest
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+# Candidates kept per prefix, enough to re-rank by similarity before trimming to the limit
+TOP_CANDIDATES = 50
+
+# Prefixes up to this length match thousands of words, so their top candidates are precomputed
+PRECOMPUTED_PREFIX_LENGTH = 3
+
+class SuggestService:
+    """
+    Prefix autocomplete over the game vocabulary, ranked by Brown-corpus frequency.
+
+    The vocabulary is a sorted word list with a parallel array of frequencies, so
+    a prefix is a bisect over the list and its matches are one contiguous slice.
+    Words come from VOCABULARY_PATH ("word<TAB>frequency" lines, written by
+    scripts/build_vocabulary.py) or, failing that, from the embedding vocabulary
+    in file order. Suggestions can be re-ranked by similarity to the current word.
+    """
+
+    def __init__(self, similarity=None, vocabulary_path=None):
+        self.similarity = similarity
+        self.vocabulary_path = vocabulary_path if vocabulary_path is not None else Config.VOCABULARY_PATH
+        self.words = []
+        self.frequencies = array("I")
+        # Short prefix -> indexes of its most frequent words, best first
+        self._top = {}
+        self._lock = threading.Lock()
+        self._load_attempted = False
+
+    def _read_vocabulary(self):
+        """Return {word: frequency} from the vocabulary file or the embedding vocabulary"""
+        if self.vocabulary_path and os.path.exists(self.vocabulary_path):
+            frequencies = {}
+            with open(self.vocabulary_path, encoding="utf-8") as f:
+                for line in f:
+                    word, _, frequency = line.strip().partition("\t")
+                    if word.isalpha():
+                        frequencies[word.lower()] = int(frequency or 0)
+            return frequencies
+
+        if self.similarity is not None and self.similarity.is_available():
+            # Embedding vocabularies are usually ordered by frequency, so earlier words rank higher
+            vocab = self.similarity.vocab
+            return {word: len(vocab) - i for i, word in enumerate(vocab) if word.isalpha()}
+        return {}
+
+    def load(self):
+        """Build the prefix index once; return True if there is a vocabulary"""
+        if self._load_attempted:
+            return bool(self.words)
+
+        with self._lock:
+            if self._load_attempted:
+                return bool(self.words)
+            self._load_attempted = True
+
+            try:
+                frequencies = self._read_vocabulary()
+            except Exception as e:
+                logger.error(f"Failed to load suggestion vocabulary: {str(e)}")
+                return False
+            if not frequencies:
+                logger.warning("No vocabulary for suggestions, /api/suggest is disabled")
+                return False
+
+            words = sorted(frequencies)
+            self.frequencies = array("I", (min(frequencies[word], 2**32 - 1) for word in words))
+            self.words = words
+            self._top = self._precompute_top()
+            logger.info(f"Loaded {len(words)} words for suggestions ({len(self._top)} precomputed prefixes)")
+            return True
+
+    def _precompute_top(self):
+        """Top candidates for every short prefix with more matches than TOP_CANDIDATES"""
+        top = {}
+        for length in range(1, PRECOMPUTED_PREFIX_LENGTH + 1):
+            prefixes = sorted({word[:length] for word in self.words if len(word) >= length})
+            for prefix in prefixes:
+                lo, hi = self._range(prefix)
+                if hi - lo > TOP_CANDIDATES:
+                    top[prefix] = self._rank(lo, hi)
+        return top
+
+    def _range(self, prefix):
+        lo = bisect_left(self.words, prefix)
+        # Every word with the prefix sorts before prefix + the highest code point
+        hi = bisect_left(self.words, prefix + "\U0010ffff", lo)
+        return lo, hi
+
+    def _rank(self, lo, hi):
+        frequencies = self.frequencies
+        return nlargest(TOP_CANDIDATES, range(lo, hi), key=frequencies.__getitem__)
+
+    def suggest(self, prefix, limit=10, current_word=None):
+        """Up to limit vocabulary words starting with prefix, most frequent (or most similar) first"""
+        if not prefix or not self.load():
+            return []
+
+        prefix = prefix.lower()
+        candidates = self._top.get(prefix)
+        if candidates is None:
+            candidates = self._rank(*self._range(prefix))
+        words = [self.words[i] for i in candidates]
+
+        if current_word and self.similarity is not None:
+            scores = self.similarity.similarities(current_word, words)
+            if any(score is not None for score in scores):
+                # Stable sort keeps frequency order among words without a score
+                order = sorted(range(len(words)), key=lambda i: -scores[i] if scores[i] is not None else float("inf"))
+                words = [words[i] for i in order]
+        return words[:limit]
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the puzzle generation pipeline in scripts/word_pair_generator.py.
+
+Times each stage on the real NLTK corpora and reports wall time, peak memory
+and, for generate_word_pair, pairs per second:
+
+    load_embeddings                    word frequencies from the Brown corpus
+    load_common_words                  WordNet filtering of the vocabulary
+    get_word_definition                definitions for a sample of common words
+    are_words_semantically_unrelated   WordNet path similarity for random pairs
+    generate_word_pair                 full pair generation
+
+Peak memory is traced with tracemalloc, which slows every stage by a similar
+factor; pass --no-memory for untraced wall times. Results are compared
+against a stored baseline recorded with the same settings; any stage slower than the
+baseline by more than the tolerance, or missing from it, fails the run with a
+non-zero exit code. So does a missing baseline file: record one on the machine
+that runs the check with --update-baseline (once the NLTK corpora are available,
+since the numbers only mean something on the same hardware) and commit it as
+benchmarks/generator_baseline.json.
+
+Usage:
+    python benchmarks/generator_bench.py [--sample N] [--pairs N] [--seed SEED] [--no-memory]
+                                         [--baseline PATH] [--tolerance FRACTION] [--update-baseline] [--output PATH]
+
+Examples:
+    # Record a baseline on this machine
+    python benchmarks/generator_bench.py --update-baseline
+
+    # Later: fail if any stage is more than 25% slower than the baseline
+    python benchmarks/generator_bench.py --tolerance 0.25
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(API_DIR, "scripts"))
+
+DEFAULT_BASELINE = os.path.join(API_DIR, "benchmarks", "generator_baseline.json")
+
+def measure(name, func, *args, count=None, trace_memory=True):
+    """Run func once and return (result, stats) with wall time and peak traced memory"""
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    peak = 0
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    stats = {"seconds": round(elapsed, 4), "peak_memory_mb": round(peak / 2**20, 2)}
+    if count:
+        stats["items"] = count
+        stats["items_per_second"] = round(count / elapsed, 2) if elapsed else None
+    print(f"{name:<34} {stats['seconds']:>10.3f}s {stats['peak_memory_mb']:>10.2f} MB"
+          + (f" {stats['items_per_second']:>10} /s" if count else ""))
+    return result, stats
+
+def run(sample, pairs, seed, trace_memory=True):
+    # Import inside the run so the corpus download and client setup are not timed
+    import nltk
+    nltk.download('brown', quiet=True)
+    import word_pair_generator as generator
+
+    random.seed(seed)
+    stages = {}
+    print(f"{'stage':<34} {'wall time':>11} {'peak mem':>13}")
+
+    word_freq, stages["load_embeddings"] = measure("load_embeddings", generator.load_embeddings, trace_memory=trace_memory)
+    common_words, stages["load_common_words"] = measure(
+        "load_common_words", generator.load_common_words, word_freq, trace_memory=trace_memory)
+
+    words = random.sample(common_words, min(sample, len(common_words)))
+    _, stages["get_word_definition"] = measure(
+        "get_word_definition",
+        lambda: [generator.get_word_definition(w) for w in words],
+        count=len(words),
+        trace_memory=trace_memory,
+    )
+
+    pair_generator = generator.WordPairGenerator(word_freq, common_words)
+    word_pairs = [(random.choice(common_words), random.choice(common_words)) for _ in range(sample)]
+    _, stages["are_words_semantically_unrelated"] = measure(
+        "are_words_semantically_unrelated",
+        lambda: [pair_generator.are_words_semantically_unrelated(a, b) for a, b in word_pairs],
+        count=len(word_pairs),
+        trace_memory=trace_memory,
+    )
+
+    generated, stages["generate_word_pair"] = measure(
+        "generate_word_pair",
+        lambda: [pair_generator.generate_word_pair() for _ in range(pairs)],
+        count=pairs,
+        trace_memory=trace_memory,
+    )
+    stages["generate_word_pair"]["failed"] = sum(1 for start, *_ in generated if not start)
+
+    return {
+        "config": {"sample": sample, "pairs": pairs, "seed": seed, "trace_memory": trace_memory,
+                   "vocabulary": len(common_words)},
+        "stages": stages,
+    }
+
+def compare(results, baseline, tolerance):
+    """Return the stages that are slower than the baseline by more than tolerance, or not in it"""
+    regressions = []
+    for stage, stats in results["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous or not previous.get("seconds"):
+            print(f"{stage:<34} not in baseline  REGRESSION")
+            regressions.append(stage)
+            continue
+        change = (stats["seconds"] - previous["seconds"]) / previous["seconds"]
+        marker = "REGRESSION" if change > tolerance else "ok"
+        print(f"{stage:<34} {previous['seconds']:>10.3f}s -> {stats['seconds']:>8.3f}s {change:>+8.1%}  {marker}")
+        if change > tolerance:
+            regressions.append(stage)
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the puzzle generation pipeline')
+    parser.add_argument('--sample', type=int, default=200, help='Words/pairs for the definition and relatedness stages (default: 200)')
+    parser.add_argument('--pairs', type=int, default=20, help='Word pairs to generate (default: 20)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed so runs are comparable (default: 42)')
+    parser.add_argument('--no-memory', action='store_true', help='Skip tracemalloc so wall times are untraced')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline results file')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown per stage before failing (default: 0.2)')
+    parser.add_argument('--update-baseline', '--save-baseline', dest='update_baseline', action='store_true',
+                        help='Write these results as the new baseline')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = run(args.sample, args.pairs, args.seed, trace_memory=not args.no_memory)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        # Passing without a baseline would make the check meaningless
+        print(f"\nFAILED: no baseline at {args.baseline}; run with --update-baseline to record one")
+        sys.exit(1)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("config") != results["config"]:
+        print("\nWarning: baseline was recorded with different settings, comparison may be misleading")
+
+    print("\nCompared with baseline:")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nFAILED: {', '.join(regressions)} slower than baseline by more than {args.tolerance:.0%} or missing from it")
+        sys.exit(1)
+    print("\nNo regressions")
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test for the Connectle API.
+
+Starts the HF Space and PostgREST stand-ins, runs the real app under gunicorn
+against them, and drives realistic traffic scenarios:
+
+    midnight-spike  every player loads the new daily puzzle at once
+    guess-burst     players submitting guesses (validate-word, check-word)
+    hint-storm      many players asking for hints at the same time
+
+Reports throughput, p50/p95/p99 latency and error rate per route, and writes
+the results as JSON so runs can be compared over time.
+
+Usage:
+    python benchmarks/load_test.py [--scenario NAME ...] [--duration SECONDS] [--concurrency N]
+                                   [--workers N] [--threads N] [--hf-latency-ms MS] [--hf-error-rate RATE]
+                                   [--output PATH] [--compare PATH] [--keep-rate-limits]
+
+Examples:
+    # Run every scenario with the defaults
+    python benchmarks/load_test.py
+
+    # Hint storm against a slow, flaky Space, compared with an earlier run
+    python benchmarks/load_test.py --scenario hint-storm --hf-latency-ms 800 --hf-error-rate 0.05 \\
+        --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import urlencode
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from stand_ins import WORDS, start_stand_ins
+
+# Scenario name -> duration, concurrency, ramp-up and request mix (route, weight)
+SCENARIOS = {
+    "midnight-spike": {"duration": 20, "concurrency": 64, "ramp": 2, "mix": [("daily-puzzle", 1.0)]},
+    "guess-burst": {"duration": 30, "concurrency": 32, "ramp": 5,
+                    "mix": [("validate-word", 0.6), ("check-word", 0.3), ("daily-puzzle", 0.1)]},
+    "hint-storm": {"duration": 20, "concurrency": 32, "ramp": 2,
+                   "mix": [("get-hint", 0.8), ("validate-word", 0.2)]},
+}
+
+RESULTS_DIR = os.path.join(API_DIR, "benchmarks", "results")
+
+def build_request(route):
+    """Return the path for one request to route with realistic parameters"""
+    word1, word2 = random.sample(WORDS, 2)
+    if route == "daily-puzzle":
+        return "/api/daily-puzzle"
+    if route == "validate-word":
+        return "/api/validate-word?" + urlencode({"current_word": word1, "next_word": word2})
+    if route == "check-word":
+        return "/api/check-word?" + urlencode({"word": word1})
+    if route == "get-hint":
+        return "/api/get-hint?" + urlencode({"current_word": word1, "target_word": word2})
+    raise ValueError(f"Unknown route {route}")
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def run_scenario(port, name, duration, concurrency, ramp, mix):
+    """Drive one scenario; return per-route latency and status results"""
+    routes = [route for route, _ in mix]
+    weights = [weight for _, weight in mix]
+    latencies = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    lock = threading.Lock()
+    started = time.perf_counter()
+    deadline = started + duration
+
+    def client(index):
+        # Spread client start times over the ramp-up period
+        time.sleep(ramp * index / max(concurrency, 1))
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local_latencies = defaultdict(list)
+        local_statuses = defaultdict(lambda: defaultdict(int))
+        while time.perf_counter() < deadline:
+            route = random.choices(routes, weights)[0]
+            request_start = time.perf_counter()
+            try:
+                conn.request("GET", build_request(route))
+                response = conn.getresponse()
+                response.read()
+                status = str(response.status)
+            except Exception:
+                status = "exception"
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            local_latencies[route].append(time.perf_counter() - request_start)
+            local_statuses[route][status] += 1
+        conn.close()
+        with lock:
+            for route, values in local_latencies.items():
+                latencies[route].extend(values)
+            for route, counts in local_statuses.items():
+                for status, count in counts.items():
+                    statuses[route][status] += count
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for route in routes:
+        values = sorted(latencies[route])
+        total = len(values)
+        errors = sum(count for status, count in statuses[route].items()
+                     if status == "exception" or status.startswith("5"))
+        results[route] = {
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0,
+            "error_rate": round(errors / total, 4) if total else 0,
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2) if values else None,
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2) if values else None,
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2) if values else None,
+            "max_ms": round(values[-1] * 1000, 2) if values else None,
+            "statuses": dict(statuses[route]),
+        }
+    return {"duration_seconds": round(elapsed, 2), "concurrency": concurrency, "routes": results}
+
+def wait_for_api(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/api/health")
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+def start_api(port, workers, threads, hf_url, db_url, state_dir, keep_rate_limits):
+    """Start the real app under gunicorn, pointed at the stand-ins"""
+    gunicorn = shutil.which("gunicorn")
+    if not gunicorn:
+        print("gunicorn is not installed (pip install gunicorn)")
+        sys.exit(1)
+
+    env = {
+        **os.environ,
+        "FLASK_ENV": "production",
+        "HF_SPACE_URL": hf_url,
+        "SUPABASE_URL": db_url,
+        "SUPABASE_KEY": "load-test-key",
+        "RATELIMIT_ENABLED": "true" if keep_rate_limits else "false",
+        "RATELIMIT_STORAGE_URI": "sqlite:///" + os.path.join(state_dir, "ratelimit.db"),
+        "METRICS_DIR": os.path.join(state_dir, "metrics"),
+        "SCHEDULER_LOCK_PATH": os.path.join(state_dir, "scheduler.lock"),
+        # Keep the stand-in puzzles out of the shared replica and snapshot that dev mode reads
+        "REPLICA_PATH": os.path.join(state_dir, "replica.db"),
+        "CACHE_SNAPSHOT_PATH": os.path.join(state_dir, "cache-snapshot.json.gz"),
+    }
+    env.pop("VERCEL_ENV", None)
+    return subprocess.Popen(
+        [gunicorn, "-w", str(workers), "--threads", str(threads), "-b", f"127.0.0.1:{port}",
+         "--log-level", "warning", "wsgi:app"],
+        cwd=API_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+def print_results(results, baseline=None):
+    for scenario, data in results["scenarios"].items():
+        print(f"\n{scenario} ({data['concurrency']} clients, {data['duration_seconds']}s)")
+        print(f"  {'route':<15} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}")
+        for route, stats in data["routes"].items():
+            line = (f"  {route:<15} {stats['throughput_rps']:>9} {stats['p50_ms']!s:>9} "
+                    f"{stats['p95_ms']!s:>9} {stats['p99_ms']!s:>9} {stats['error_rate']:>8.2%}")
+            previous = (baseline or {}).get("scenarios", {}).get(scenario, {}).get("routes", {}).get(route)
+            if previous and previous.get("p95_ms") and stats["p95_ms"]:
+                change = (stats["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"]
+                line += f"   p95 {change:+.1%} vs baseline"
+            print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load test the Connectle API against local stand-ins')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help='Scenario to run (default: all)')
+    parser.add_argument('--duration', type=float, help='Override the duration of every scenario in seconds')
+    parser.add_argument('--concurrency', type=int, help='Override the number of concurrent clients')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes (default: 4)')
+    parser.add_argument('--threads', type=int, default=8, help='Threads per gunicorn worker (default: 8)')
+    parser.add_argument('--port', type=int, default=5099, help='Port for the API under test (default: 5099)')
+    parser.add_argument('--hf-latency-ms', type=float, default=150, help='Mean HF Space latency (default: 150)')
+    parser.add_argument('--hf-jitter-ms', type=float, default=50, help='HF Space latency jitter (default: 50)')
+    parser.add_argument('--hf-error-rate', type=float, default=0.0, help='Fraction of HF Space calls that fail (default: 0)')
+    parser.add_argument('--db-latency-ms', type=float, default=20, help='Mean PostgREST latency (default: 20)')
+    parser.add_argument('--output', help='Where to write the JSON results (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='Earlier results file to compare p95 latency against')
+    parser.add_argument('--keep-rate-limits', action='store_true', help='Leave per-IP rate limits enabled')
+    args = parser.parse_args()
+
+    hf_server, db_server = start_stand_ins(
+        hf_latency_ms=args.hf_latency_ms, hf_jitter_ms=args.hf_jitter_ms,
+        hf_error_rate=args.hf_error_rate, db_latency_ms=args.db_latency_ms,
+    )
+    hf_url = f"http://127.0.0.1:{hf_server.server_address[1]}"
+    db_url = f"http://127.0.0.1:{db_server.server_address[1]}"
+
+    state_dir = tempfile.mkdtemp(prefix="connectle-load-test-")
+    api = start_api(args.port, args.workers, args.threads, hf_url, db_url, state_dir, args.keep_rate_limits)
+    try:
+        if not wait_for_api(args.port):
+            print("API did not become healthy")
+            sys.exit(1)
+
+        results = {
+            "timestamp": datetime.now().isoformat(),
+            "config": {
+                "workers": args.workers,
+                "threads": args.threads,
+                "hf_latency_ms": args.hf_latency_ms,
+                "hf_jitter_ms": args.hf_jitter_ms,
+                "hf_error_rate": args.hf_error_rate,
+                "db_latency_ms": args.db_latency_ms,
+            },
+            "scenarios": {},
+        }
+        for name in args.scenario or list(SCENARIOS):
+            scenario = SCENARIOS[name]
+            print(f"Running {name}...")
+            results["scenarios"][name] = run_scenario(
+                args.port,
+                name,
+                args.duration or scenario["duration"],
+                args.concurrency or scenario["concurrency"],
+                scenario["ramp"],
+                scenario["mix"],
+            )
+    finally:
+        api.terminate()
+        try:
+            api.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            api.kill()
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the HF Space and Supabase (PostgREST) used by the load tests.
+
+The HF Space stand-in serves /check-similarity, /hint and /check-word with
+configurable latency and error rate. The PostgREST stand-in serves the
+puzzles and puzzle_schedule tables plus the rotate_daily_puzzle,
+claim_scheduler_run and record_puzzle_results RPCs, enough for the API's own queries.
+
+Usage:
+    python benchmarks/stand_ins.py [--hf-port PORT] [--db-port PORT] [--hf-latency-ms MS]
+                                   [--hf-jitter-ms MS] [--hf-error-rate RATE] [--db-latency-ms MS]
+                                   [--puzzles COUNT]
+
+Examples:
+    # Serve both stand-ins with a 150 ms +/- 50 ms Space and 1% errors
+    python benchmarks/stand_ins.py --hf-latency-ms 150 --hf-jitter-ms 50 --hf-error-rate 0.01
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WORDS = [
+    "cold", "warm", "hot", "ice", "fire", "water", "ocean", "river", "sea", "rain",
+    "snow", "sun", "moon", "star", "sky", "cloud", "storm", "wind", "tree", "forest",
+    "leaf", "flower", "garden", "house", "home", "door", "window", "road", "car", "train",
+    "food", "meal", "dinner", "bread", "milk", "drink", "coffee", "tea", "music", "song",
+    "dance", "book", "story", "word", "letter", "paper", "school", "teacher", "child", "friend",
+]
+
+def similarity(word1, word2):
+    """Deterministic pseudo-similarity in [0, 1] for a word pair"""
+    if word1 == word2:
+        return 1.0
+    digest = hashlib.sha1("|".join(sorted((word1, word2))).encode()).digest()
+    return round(int.from_bytes(digest[:4], "big") / 2**32, 4)
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, handler, latency_ms=0, jitter_ms=0, error_rate=0.0):
+        super().__init__(address, handler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def simulate(self):
+        """Sleep for the configured latency; return True if this request should fail"""
+        delay = self.server.latency_ms + random.uniform(-self.server.jitter_ms, self.server.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        return random.random() < self.server.error_rate
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class HFSpaceHandler(StandInHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if self.simulate():
+            return self.send_json({"detail": "Simulated Space error"}, 500)
+
+        if url.path == "/check-similarity":
+            score = similarity(params.get("word1", ""), params.get("word2", ""))
+            return self.send_json({"similarity": score, "valid": score > 0.47})
+
+        if url.path == "/check-word":
+            return self.send_json({"is_valid": params.get("word", "").isalpha()})
+
+        if url.path == "/hint":
+            current_word = params.get("current_word", "")
+            target_word = params.get("target_word", "")
+            candidates = sorted(
+                ({"word": w, "similarity_to_current": similarity(current_word, w), "similarity_to_target": similarity(target_word, w)}
+                 for w in WORDS if w not in (current_word, target_word)),
+                key=lambda c: c["similarity_to_target"],
+                reverse=True,
+            )[:5]
+            return self.send_json({
+                "hint": candidates[0]["word"] if candidates else None,
+                "message": "Try this word",
+                "similarity_to_current": candidates[0]["similarity_to_current"] if candidates else 0,
+                "similarity_to_target": candidates[0]["similarity_to_target"] if candidates else 0,
+                "similarity_between_current_and_target": similarity(current_word, target_word),
+                "all_top_candidates": candidates,
+            })
+
+        self.send_json({"detail": "Not found"}, 404)
+
+class PostgRESTHandler(StandInHandler):
+    """Minimal PostgREST: eq filters, order, limit and the embedded puzzles select"""
+
+    def do_GET(self):
+        self.simulate()
+        url = urlparse(self.path)
+        table = url.path.rsplit("/", 1)[-1]
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        store = self.server.store
+
+        with store.lock:
+            if table == "puzzles":
+                rows = list(store.puzzles)
+            elif table == "puzzle_schedule":
+                rows = [{"date": day, "puzzle_id": puzzle["id"], "puzzles": puzzle}
+                        for day, puzzle in store.schedule.items()]
+            else:
+                return self.send_json([], 200)
+
+        for key, value in params.items():
+            if key in ("select", "order", "limit", "offset"):
+                continue
+            if value.startswith("eq."):
+                expected = value[3:]
+                rows = [r for r in rows if str(r.get(key)).lower() == expected.lower()]
+
+        if "order" in params:
+            column, _, direction = params["order"].partition(".")
+            rows.sort(key=lambda r: str(r.get(column)), reverse=direction.startswith("desc"))
+        if "limit" in params:
+            rows = rows[:int(params["limit"])]
+
+        self.send_json(rows)
+
+    def do_POST(self):
+        self.simulate()
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        store = self.server.store
+
+        if url.path.endswith("/rpc/rotate_daily_puzzle"):
+            with store.lock:
+                candidates = [p for p in store.puzzles if not p["is_daily"]]
+                if not candidates:
+                    return self.send_json([])
+                selected = random.choice(candidates)
+                for puzzle in store.puzzles:
+                    puzzle["is_daily"] = puzzle["id"] == selected["id"]
+            return self.send_json([selected])
+
+        if url.path.endswith("/rpc/claim_scheduler_run"):
+            key = (body.get("job_name"), body.get("run_date"))
+            with store.lock:
+                claimed = key not in store.claims
+                store.claims.add(key)
+            return self.send_json(claimed)
+
+        if url.path.endswith("/rpc/record_puzzle_results"):
+            with store.lock:
+                store.recorded_results += len(body.get("results") or [])
+            return self.send_json(None)
+
+        self.send_json({"message": "Not supported by the stand-in"}, 404)
+
+class PuzzleStore:
+    def __init__(self, count):
+        self.lock = threading.Lock()
+        self.claims = set()
+        self.recorded_results = 0
+        self.puzzles = []
+        now = datetime.now()
+        for i in range(count):
+            start_word, end_word = random.sample(WORDS, 2)
+            self.puzzles.append({
+                "id": str(uuid.uuid4()),
+                "start_word": start_word,
+                "end_word": end_word,
+                "start_definition": f"- Definition of {start_word}",
+                "end_definition": f"- Definition of {end_word}",
+                "transition_graph": {},
+                "date": now.date().isoformat(),
+                "created_at": (now - timedelta(minutes=i)).isoformat(),
+                "is_daily": i == 0,
+                "difficulty": None,
+            })
+        # A week of schedule around today
+        self.schedule = {
+            (date.today() + timedelta(days=offset)).isoformat(): self.puzzles[(offset + 1) % count]
+            for offset in range(-1, 7)
+        }
+
+def start_stand_ins(hf_port=0, db_port=0, hf_latency_ms=150, hf_jitter_ms=50, hf_error_rate=0.0,
+                    db_latency_ms=20, puzzles=100):
+    """Start both stand-ins on background threads; return (hf_server, db_server)"""
+    hf_server = StandInServer(("127.0.0.1", hf_port), HFSpaceHandler, hf_latency_ms, hf_jitter_ms, hf_error_rate)
+    db_server = StandInServer(("127.0.0.1", db_port), PostgRESTHandler, db_latency_ms, db_latency_ms / 4)
+    db_server.store = PuzzleStore(puzzles)
+    for server in (hf_server, db_server):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return hf_server, db_server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve local HF Space and PostgREST stand-ins')
+    parser.add_argument('--hf-port', type=int, default=7861, help='HF Space stand-in port (default: 7861)')
+    parser.add_argument('--db-port', type=int, default=54321, help='PostgREST stand-in port (default: 54321)')
+    parser.add_argument('--hf-latency-ms', type=float, default=150, help='Mean HF Space latency (default: 150)')
+    parser.add_argument('--hf-jitter-ms', type=float, default=50, help='HF Space latency jitter (default: 50)')
+    parser.add_argument('--hf-error-rate', type=float, default=0.0, help='Fraction of HF Space calls that fail (default: 0)')
+    parser.add_argument('--db-latency-ms', type=float, default=20, help='Mean PostgREST latency (default: 20)')
+    parser.add_argument('--puzzles', type=int, default=100, help='Number of puzzles in the stand-in table (default: 100)')
+    args = parser.parse_args()
+
+    hf_server, db_server = start_stand_ins(
+        args.hf_port, args.db_port, args.hf_latency_ms, args.hf_jitter_ms,
+        args.hf_error_rate, args.db_latency_ms, args.puzzles,
+    )
+    print(f"HF Space stand-in on http://127.0.0.1:{hf_server.server_address[1]}", flush=True)
+    print(f"PostgREST stand-in on http://127.0.0.1:{db_server.server_address[1]}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,72 @@
+"""
+Production gunicorn settings for the Connectle API (picked up automatically from api/).
+
+The app is preloaded in the master: the embedding matrix, suggestion index and
+definitions are loaded once and the workers share those pages copy-on-write.
+The matrix and definitions are read-only mmaps, so their pages stay shared
+through the OS page cache no matter what the workers do. The scheduler is
+started after fork in each worker, where the leader lock picks the one that
+rotates (see README_CRON.md).
+
+Almost all request time is spent waiting on the HF Space and Supabase, so
+concurrency comes from threads; processes only add CPU for JSON and gzip work
+and cost memory each.
+
+Environment:
+    PORT                 listen port (default 5001)
+    WEB_CONCURRENCY      worker processes (default: CPU count, at most 4)
+    GUNICORN_THREADS     threads per worker (default 8)
+    GUNICORN_TIMEOUT     seconds before a silent worker is restarted (default 30)
+"""
+
+import gc
+import os
+
+# wsgi.py must not start the scheduler in the master: its threads would not survive the fork
+os.environ.setdefault("DEFER_SCHEDULER", "true")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+preload_app = True
+worker_class = "gthread"
+workers = int(os.getenv("WEB_CONCURRENCY") or min(os.cpu_count() or 1, 4))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then so private (copied) pages are returned to the OS
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = max_requests // 10
+
+def _format_memory(usage):
+    return ", ".join(f"{kind} {value / 2**20:.1f} MB" for kind, value in usage.items()) or "unavailable"
+
+def when_ready(server):
+    """Load the read-only word data in the master, then freeze it out of the garbage collector"""
+    from app.metrics import memory_usage
+    from app.routes import game_service
+
+    loaded = game_service.preload()
+    # Objects moved to the permanent generation are never scanned by gc, so
+    # collections in the workers don't write to (and copy) the preloaded pages
+    gc.freeze()
+    server.log.info(f"Preloaded {', '.join(name for name, ok in loaded.items() if ok) or 'nothing'}; "
+                    f"master memory: {_format_memory(memory_usage())}")
+
+def post_worker_init(worker):
+    """Start the scheduler thread in this worker and report how much memory it shares with the master"""
+    from app.config import Config
+    from app.cron import start_scheduler
+    from app.metrics import memory_usage
+
+    if not Config.LEAN_BOOT:
+        start_scheduler()
+    worker.log.info(f"Worker {worker.pid} memory: {_format_memory(memory_usage())}")
+
+def worker_exit(server, worker):
+    """Write buffered game results before the worker goes away"""
+    from app.services.stats_buffer import stats_buffer
+
+    try:
+        stats_buffer.flush()
+    except Exception as e:
+        server.log.error(f"Failed to flush stats buffer in worker {worker.pid}: {e}")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Build the definitions file served by /api/define.
+
+Looks up the top 3 WordNet definitions (the generator's get_word_definition)
+for every word in the game vocabulary and writes them to a sorted,
+memory-mappable key-value file, so the API never imports NLTK.
+
+Usage:
+    python scripts/build_definitions.py [--vocabulary PATH] [--output PATH]
+
+Examples:
+    # Build data/vocabulary.tsv first, then data/definitions.bin from it
+    python scripts/build_vocabulary.py
+    python scripts/build_definitions.py
+"""
+
+import argparse
+import os
+import sys
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(API_DIR)
+sys.path.append(os.path.join(API_DIR, "scripts"))
+
+def read_words(path):
+    """Words from a vocabulary file ("word<TAB>frequency" or one word per line)"""
+    with open(path, encoding="utf-8") as f:
+        return [line.split("\t", 1)[0].strip().lower() for line in f if line.strip()]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Precompute word definitions for /api/define')
+    parser.add_argument('--vocabulary', default=os.path.join(API_DIR, 'data', 'vocabulary.tsv'),
+                        help='Words to define (default: data/vocabulary.tsv)')
+    parser.add_argument('--output', default=os.path.join(API_DIR, 'data', 'definitions.bin'),
+                        help='Where to write the definitions (default: data/definitions.bin)')
+    args = parser.parse_args()
+
+    # The generator module downloads WordNet on import
+    from word_pair_generator import get_word_definition
+    from app.services.definition_store import write_definitions
+
+    words = read_words(args.vocabulary)
+    started = time.perf_counter()
+    definitions = {}
+    for i, word in enumerate(words, 1):
+        definition = get_word_definition(word)
+        if definition:
+            definitions[word] = definition
+        if i % 5000 == 0:
+            print(f"Defined {i}/{len(words)} words...")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    count = write_definitions(args.output, definitions)
+    print(f"Wrote {count} definitions for {len(words)} words to {args.output} "
+          f"({os.path.getsize(args.output) / 2**20:.1f} MB) in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Build the quantized embedding matrix loaded by SimilarityService (EMBEDDINGS_PATH).
+
+Reads a source embedding file, keeps the words in the game vocabulary (most
+frequent first), normalizes every row and writes a float16 or int8 .npy with
+its .vocab and .json sidecars. A float32 matrix costs every gunicorn worker
+hundreds of MB; the quantized file is a half or a quarter of that and is
+memory-mapped, so its pages are shared between workers.
+
+The report compares the quantized matrix with full precision: how many
+accept/reject decisions at the game's 0.47 threshold flip, on random word
+pairs and on each sampled word's nearest neighbors (where real moves sit
+close to the threshold), plus matrix memory and pairwise throughput.
+
+Source formats:
+    .npy with a sidecar .vocab   one row per word, words in row order
+    .txt / .vec                  word2vec or GloVe text ("word v1 v2 ...", optional "rows dims" header)
+    .bin                         word2vec binary
+
+Usage:
+    python scripts/build_embeddings.py SOURCE [--vocabulary PATH] [--output PATH]
+                                       [--dtype {float16,int8}] [--pairs N] [--queries N]
+
+Examples:
+    # float16 matrix for the default EMBEDDINGS_PATH location
+    python scripts/build_embeddings.py ~/models/glove.6B.300d.txt
+
+    # int8 matrix, checked on 500k random pairs
+    python scripts/build_embeddings.py ~/models/GoogleNews-vectors-negative300.bin --dtype int8 --pairs 500000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(API_DIR)
+
+import numpy as np
+
+from app.services.similarity_service import QUANTIZED_DTYPES, SIMILARITY_THRESHOLD, SimilarityService, write_embeddings
+
+# Neighbors per sampled word checked for flipped decisions
+NEIGHBORS = 50
+
+def read_vocabulary(path):
+    """Words from a vocabulary file, most frequent first ("word<TAB>frequency" or one word per line)"""
+    frequencies = {}
+    with open(path, encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            word, _, frequency = line.strip().partition("\t")
+            if word.isalpha():
+                frequencies[word.lower()] = int(frequency) if frequency else -i
+    return sorted(frequencies, key=lambda word: -frequencies[word])
+
+def read_source(path, wanted):
+    """Return {word: float32 vector} for the wanted words found in the source file"""
+    vectors = {}
+    if path.endswith(".npy"):
+        matrix = np.load(path, mmap_mode="r")
+        with open(os.path.splitext(path)[0] + ".vocab", encoding="utf-8") as f:
+            for i, line in enumerate(f):
+                word = line.strip().lower()
+                if word in wanted and word not in vectors:
+                    vectors[word] = np.asarray(matrix[i], dtype=np.float32)
+        return vectors
+
+    if path.endswith(".bin"):
+        with open(path, "rb") as f:
+            rows, dims = map(int, f.readline().split())
+            width = dims * 4
+            for _ in range(rows):
+                word = b""
+                while (char := f.read(1)) not in (b" ", b""):
+                    if char != b"\n":
+                        word += char
+                vector = f.read(width)
+                word = word.decode("utf-8", errors="ignore").lower()
+                if word in wanted and word not in vectors:
+                    vectors[word] = np.frombuffer(vector, dtype=np.float32).copy()
+        return vectors
+
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            word, _, values = line.rstrip().partition(" ")
+            word = word.lower()
+            # The word2vec header line ("rows dims") is never a vocabulary word
+            if word in wanted and word not in vectors:
+                vectors[word] = np.array(values.split(), dtype=np.float32)
+    return vectors
+
+def sample_pairs(full, rng, pairs, queries):
+    """Random (a, b) row pairs plus each sampled query word's nearest neighbors"""
+    rows = len(full)
+    random_pairs = rng.integers(0, rows, size=(pairs, 2))
+    random_pairs = random_pairs[random_pairs[:, 0] != random_pairs[:, 1]]
+
+    neighbor_pairs = []
+    for query in rng.choice(rows, size=min(queries, rows), replace=False):
+        scores = full @ full[query]
+        scores[query] = -np.inf
+        top = np.argpartition(-scores, NEIGHBORS)[:NEIGHBORS]
+        neighbor_pairs.extend((query, neighbor) for neighbor in top)
+    return random_pairs, np.array(neighbor_pairs, dtype=np.int64).reshape(-1, 2)
+
+def pair_scores(matrix, pairs, scale=1.0, batch=65536):
+    """Similarity of each row pair, dequantizing one batch at a time"""
+    scores = np.empty(len(pairs), dtype=np.float32)
+    for start in range(0, len(pairs), batch):
+        chunk = pairs[start:start + batch]
+        a = np.asarray(matrix[chunk[:, 0]], dtype=np.float32)
+        b = np.asarray(matrix[chunk[:, 1]], dtype=np.float32)
+        scores[start:start + len(chunk)] = np.einsum("ij,ij->i", a, b) * (scale * scale)
+    return scores
+
+def compare(label, full, quantized, pairs, scale):
+    expected = pair_scores(full, pairs)
+    actual = pair_scores(quantized, pairs, scale)
+    accepted = expected > SIMILARITY_THRESHOLD
+    flipped = int(np.count_nonzero(accepted != (actual > SIMILARITY_THRESHOLD)))
+    error = np.abs(expected - actual)
+    print(f"  {label}: {len(pairs)} pairs, {int(accepted.sum())} accepted at full precision, "
+          f"{flipped} decisions flipped ({flipped / max(len(pairs), 1):.4%}), "
+          f"max |error| {error.max(initial=0):.5f}, mean |error| {error.mean() if len(error) else 0:.6f}")
+
+def throughput(label, matrix, pairs, scale):
+    started = time.perf_counter()
+    pair_scores(matrix, pairs, scale)
+    elapsed = time.perf_counter() - started
+    print(f"  {label}: {len(pairs) / elapsed:,.0f} pairs/s")
+    return elapsed
+
+def time_scans(label, score, rows, queries):
+    started = time.perf_counter()
+    for query in queries:
+        score(int(query))
+    elapsed = (time.perf_counter() - started) / max(len(queries), 1)
+    print(f"  {label}: {elapsed * 1000:.1f} ms per full-vocabulary scan ({rows / elapsed:,.0f} pairs/s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build a quantized, pre-normalized embedding matrix for the game vocabulary')
+    parser.add_argument('source', help='Source embeddings (.npy with .vocab, word2vec/GloVe .txt/.vec, or word2vec .bin)')
+    parser.add_argument('--vocabulary', default=os.path.join(API_DIR, 'data', 'vocabulary.tsv'),
+                        help='Words to keep (default: data/vocabulary.tsv)')
+    parser.add_argument('--output', default=os.path.join(API_DIR, 'data', 'embeddings.npy'),
+                        help='Where to write the matrix (default: data/embeddings.npy)')
+    parser.add_argument('--dtype', choices=QUANTIZED_DTYPES, default='float16', help='Stored precision (default: float16)')
+    parser.add_argument('--pairs', type=int, default=200000, help='Random word pairs to compare (default: 200000)')
+    parser.add_argument('--queries', type=int, default=200,
+                        help=f'Words whose {NEIGHBORS} nearest neighbors are compared and scanned (default: 200)')
+    parser.add_argument('--seed', type=int, default=47, help='Sampling seed (default: 47)')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    words = read_vocabulary(args.vocabulary)
+    vectors = read_source(args.source, set(words))
+    vocab = [word for word in words if word in vectors]
+    if not vocab:
+        sys.exit(f"No vocabulary words found in {args.source}")
+    print(f"Found {len(vocab)} of {len(words)} vocabulary words in {args.source} "
+          f"({time.perf_counter() - started:.1f}s)")
+
+    full = np.stack([vectors.pop(word) for word in vocab])
+    full /= np.maximum(np.linalg.norm(full, axis=1, keepdims=True), 1e-12)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    quantized, scale = write_embeddings(args.output, vocab, full, args.dtype, source=os.path.basename(args.source))
+    print(f"Wrote {args.dtype} matrix {quantized.shape[0]}x{quantized.shape[1]} to {args.output}")
+
+    print("Memory:")
+    print(f"  float32: {full.nbytes / 2**20:.1f} MB")
+    print(f"  {args.dtype}: {quantized.nbytes / 2**20:.1f} MB ({quantized.nbytes / full.nbytes:.0%}), "
+          f"file {os.path.getsize(args.output) / 2**20:.1f} MB")
+
+    rng = np.random.default_rng(args.seed)
+    random_pairs, neighbor_pairs = sample_pairs(full, rng, args.pairs, args.queries)
+    print(f"Decisions at threshold {SIMILARITY_THRESHOLD} versus float32:")
+    compare("random pairs", full, quantized, random_pairs, scale)
+    compare("nearest neighbors", full, quantized, neighbor_pairs, scale)
+
+    print("Pairwise throughput:")
+    throughput("float32", full, random_pairs, 1.0)
+    throughput(args.dtype, quantized, random_pairs, scale)
+
+    # The written artifact as the API loads it: memory-mapped, scored in blocks
+    service = SimilarityService(args.output)
+    if not service.load():
+        sys.exit(f"SimilarityService could not load {args.output}")
+    queries = neighbor_pairs[::NEIGHBORS, 0] if len(neighbor_pairs) else np.array([0])
+    time_scans("float32", lambda query: full @ full[query], len(vocab), queries)
+    time_scans(f"{args.dtype} (SimilarityService)", service._scores, len(vocab), queries)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Build the word frequency file used by /api/suggest.
+
+Counts alphabetic words in the Brown corpus (the same frequencies the puzzle
+generator uses), keeps those seen at least --min-frequency times and writes
+them as "word<TAB>frequency" lines, sorted by word. With --embeddings-vocab,
+only words the embedding model knows are kept, so suggestions are always
+playable.
+
+Usage:
+    python scripts/build_vocabulary.py [--output PATH] [--min-frequency N] [--embeddings-vocab PATH]
+
+Examples:
+    # Write data/vocabulary.tsv (the default VOCABULARY_PATH)
+    python scripts/build_vocabulary.py
+
+    # Only words in the embedding vocabulary, seen at least 3 times
+    python scripts/build_vocabulary.py --min-frequency 3 --embeddings-vocab data/embeddings.vocab
+"""
+
+import argparse
+import os
+from collections import defaultdict
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_frequencies():
+    """Word frequencies from the Brown corpus"""
+    import nltk
+    nltk.download('brown', quiet=True)
+    from nltk.corpus import brown
+
+    word_freq = defaultdict(int)
+    for word in brown.words():
+        if word.isalpha():
+            word_freq[word.lower()] += 1
+    return word_freq
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build the suggestion vocabulary from the Brown corpus')
+    parser.add_argument('--output', default=os.path.join(API_DIR, 'data', 'vocabulary.tsv'),
+                        help='Where to write the vocabulary (default: data/vocabulary.tsv)')
+    parser.add_argument('--min-frequency', type=int, default=2, help='Minimum Brown corpus count (default: 2)')
+    parser.add_argument('--embeddings-vocab', help='Only keep words listed in this embedding .vocab file')
+    args = parser.parse_args()
+
+    word_freq = load_frequencies()
+    words = {word: freq for word, freq in word_freq.items() if freq >= args.min_frequency}
+
+    if args.embeddings_vocab:
+        with open(args.embeddings_vocab, encoding="utf-8") as f:
+            known = {line.strip().lower() for line in f if line.strip()}
+        words = {word: freq for word, freq in words.items() if word in known}
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        for word in sorted(words):
+            f.write(f"{word}\t{words[word]}\n")
+
+    print(f"Wrote {len(words)} words to {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
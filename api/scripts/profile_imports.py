@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Import-time profile of the API boot path.
+
+Runs `python -X importtime` on a fresh interpreter that imports wsgi (building the
+app) and serves one /api/daily-puzzle request, then reports the slowest imports
+by cumulative time along with total time to first response.
+
+Usage:
+    python scripts/profile_imports.py [--top N] [--lean | --full]
+
+Examples:
+    # Profile the serverless (lean) boot path
+    python scripts/profile_imports.py --lean
+
+    # Compare with the full boot that starts the scheduler
+    python scripts/profile_imports.py --full --top 30
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BOOT_SNIPPET = """
+import time
+started = time.perf_counter()
+import wsgi
+booted = time.perf_counter()
+response = wsgi.app.test_client().get('/api/daily-puzzle')
+served = time.perf_counter()
+print(f"BOOT {booted - started:.4f} {served - started:.4f} {response.status_code}")
+"""
+
+def parse_importtime(stderr):
+    """Return [(module, self_us, cumulative_us)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, module = line[len("import time:"):].split("|")
+            rows.append((module.rstrip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Profile import time of the API boot path')
+    parser.add_argument('--top', type=int, default=20, help='Number of slowest imports to show (default: 20)')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--lean', action='store_true', help='Profile with LEAN_BOOT=true (serverless)')
+    mode.add_argument('--full', action='store_true', help='Profile with LEAN_BOOT=false')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.lean:
+        env['LEAN_BOOT'] = 'true'
+    elif args.full:
+        env['LEAN_BOOT'] = 'false'
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", BOOT_SNIPPET],
+        cwd=API_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    boot_line = next((line for line in result.stdout.splitlines() if line.startswith("BOOT ")), None)
+    if not boot_line:
+        print("Boot failed:")
+        print(result.stderr[-2000:])
+        sys.exit(1)
+
+    _, boot_seconds, first_response_seconds, status = boot_line.split()
+    rows = parse_importtime(result.stderr)
+
+    print(f"Import + create_app:   {float(boot_seconds) * 1000:8.1f} ms")
+    print(f"First /api/daily-puzzle: {float(first_response_seconds) * 1000:6.1f} ms (status {status})")
+    print(f"Modules imported:      {len(rows):8d}")
+    print(f"\nSlowest {args.top} imports by cumulative time:")
+    print(f"  {'cumulative ms':>13} {'self ms':>9}  module")
+    for module, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:>13.1f} {self_us / 1000:>9.1f}  {module}")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Populate the local SQLite replica of the puzzles table (REPLICA_PATH).
+
+By default mirrors puzzles and the upcoming schedule from Supabase once, the
+same sync the scheduler leader runs periodically. With --seed, loads puzzle
+rows from a JSON file instead, which gives development without Supabase a
+real local store rather than the built-in mock puzzle.
+
+Usage:
+    python scripts/sync_replica.py [--seed PATH] [--replica PATH]
+
+Examples:
+    # Mirror from Supabase (needs SUPABASE_URL and SUPABASE_KEY)
+    python scripts/sync_replica.py
+
+    # Seed a development replica from an export of the puzzles table
+    python scripts/sync_replica.py --seed puzzles.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(API_DIR)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Populate the local puzzles replica')
+    parser.add_argument('--seed', help='JSON file with a list of puzzle rows to load instead of syncing')
+    parser.add_argument('--replica', help='Replica file (default: REPLICA_PATH)')
+    args = parser.parse_args()
+
+    if args.replica:
+        os.environ['REPLICA_PATH'] = args.replica
+
+    from app.config import Config
+    from app.models import supabase_config
+    from app.models.replica import PuzzleReplica
+
+    if not Config.REPLICA_PATH:
+        print("REPLICA_PATH is empty, the local replica is disabled")
+        sys.exit(1)
+
+    if args.seed:
+        with open(args.seed) as f:
+            puzzles = json.load(f)
+        PuzzleReplica(Config.REPLICA_PATH).replace_puzzles(puzzles)
+        print(f"Loaded {len(puzzles)} puzzles into {Config.REPLICA_PATH}")
+        sys.exit(0)
+
+    stats = supabase_config.sync_replica()
+    if not stats:
+        print("Sync failed: no valid Supabase configuration")
+        sys.exit(1)
+    print(f"Synced {stats['puzzles']} puzzles and {stats['schedule']} schedule entries "
+          f"into {Config.REPLICA_PATH} in {stats['duration_seconds']}s")
@@ -6,7 +6,7 @@ This script generates word pairs for the Connectle game and stores them in Supab
 Each word pair consists of a start word, an end word, and their definitions.
 
 Usage:
-    python word_pair_generator.py [--count COUNT] [--daily] [--set-daily ID] [--random-daily] [--list] [--list-limit LIMIT]
+    python word_pair_generator.py [--count COUNT] [--daily] [--set-daily ID] [--random-daily] [--list] [--list-limit LIMIT] [--schedule-days DAYS]
 
 Options:
     --count COUNT    Number of word pairs to generate (default: 1)
@@ -15,6 +15,7 @@ Options:
     --random-daily   Set a random puzzle as daily
     --list           List the most recent puzzles
     --list-limit LIMIT  Number of puzzles to list (default: 10)
+    --schedule-days DAYS  Schedule puzzles for every unscheduled date from today through DAYS days ahead
 
 Examples:
     # Generate one word pair
@@ -34,6 +35,9 @@ Examples:
 
     # List the most recent puzzles
     python word_pair_generator.py --list
+
+    # Fill the puzzle calendar for the next four weeks
+    python word_pair_generator.py --schedule-days 28
 """
 
 import logging
@@ -69,7 +73,7 @@ nltk.download('wordnet', quiet=True)
 
 # Add the parent directory to sys.path to allow absolute imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app.models.supabase_config import PUZZLES_TABLE
+from app.models.supabase_config import PUZZLES_TABLE, PUZZLE_SCHEDULE_TABLE
 from app.config import Config
 
 # Debug logging for Supabase configuration
@@ -376,7 +380,10 @@ def list_puzzles(limit=10):
             return []
             
         # Fetch puzzles from Supabase, ordered by creation date
-        response = supabase_client.table(PUZZLES_TABLE).select("*").order("created_at", desc=True).limit(limit).execute()
+        response = supabase_client.table(PUZZLES_TABLE) \
+            .select("id, start_word, end_word, created_at, is_daily") \
+            .order("created_at", desc=True).order("id", desc=True) \
+            .limit(limit).execute()
         
         if response.data:
             return response.data
@@ -387,6 +394,60 @@ def list_puzzles(limit=10):
         logging.error(f"Failed to list puzzles: {e}")
         return []
 
+def schedule_puzzles(days=28, start_date=None):
+    """Assign a puzzle to every unscheduled date from start_date through days ahead, in one bulk insert"""
+    try:
+        if not supabase_client:
+            logging.error("No valid Supabase client available")
+            return []
+            
+        start_date = start_date or datetime.now().date()
+        end_date = start_date + timedelta(days=days - 1)
+        
+        # Dates that already have a puzzle, and every puzzle that was ever scheduled
+        schedule_response = supabase_client.table(PUZZLE_SCHEDULE_TABLE).select("date, puzzle_id").execute()
+        scheduled_dates = {row['date'] for row in schedule_response.data}
+        scheduled_ids = {row['puzzle_id'] for row in schedule_response.data}
+        
+        missing_dates = []
+        day = start_date
+        while day <= end_date:
+            if day.isoformat() not in scheduled_dates:
+                missing_dates.append(day)
+            day += timedelta(days=1)
+            
+        if not missing_dates:
+            logging.info(f"All dates from {start_date} to {end_date} are already scheduled")
+            return []
+            
+        puzzles_response = supabase_client.table(PUZZLES_TABLE).select("id, start_word, end_word").execute()
+        puzzles = puzzles_response.data
+        if not puzzles:
+            logging.error("No puzzles found to schedule")
+            return []
+            
+        # Prefer puzzles that have never been scheduled, then reuse older ones
+        fresh = [p for p in puzzles if p['id'] not in scheduled_ids]
+        reused = [p for p in puzzles if p['id'] in scheduled_ids]
+        random.shuffle(fresh)
+        random.shuffle(reused)
+        candidates = fresh + reused
+        if len(candidates) < len(missing_dates):
+            logging.warning(f"Only {len(candidates)} puzzles for {len(missing_dates)} dates, some puzzles will repeat")
+            
+        rows = []
+        for i, day in enumerate(missing_dates):
+            puzzle = candidates[i % len(candidates)]
+            rows.append({'date': day.isoformat(), 'puzzle_id': puzzle['id']})
+            print(f"{day.isoformat()} | {puzzle['id']} | {puzzle['start_word']} -> {puzzle['end_word']}")
+            
+        supabase_client.table(PUZZLE_SCHEDULE_TABLE).insert(rows).execute()
+        logging.info(f"Scheduled {len(rows)} puzzles from {missing_dates[0]} to {missing_dates[-1]}")
+        return rows
+    except Exception as e:
+        logging.error(f"Failed to schedule puzzles: {e}")
+        return []
+
 def check_daily_puzzle_api():
     """Check the daily puzzle API to see which puzzle is currently being returned"""
     try:
@@ -422,6 +483,7 @@ if __name__ == "__main__":
     parser.add_argument('--check-api', action='store_true', help='Check which puzzle is currently being returned by the daily puzzle API')
     parser.add_argument('--list', action='store_true', help='List the most recent puzzles')
     parser.add_argument('--list-limit', type=int, default=10, help='Number of puzzles to list (default: 10)')
+    parser.add_argument('--schedule-days', type=int, help='Schedule puzzles for every unscheduled date from today through this many days ahead')
     args = parser.parse_args()
     
     try:
@@ -454,6 +516,12 @@ if __name__ == "__main__":
                 print(f"Failed to set puzzle {args.set_daily} as daily")
             sys.exit(0)
             
+        # Fill the puzzle calendar ahead of time
+        if args.schedule_days:
+            rows = schedule_puzzles(args.schedule_days)
+            print(f"Scheduled {len(rows)} new dates")
+            sys.exit(0)
+            
         # Set a random puzzle as daily
         if args.random_daily:
             if set_random_daily_puzzle():
@@ -3,11 +3,7 @@ import os
 from flask import Flask, request
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Logging is configured by create_app (queue-backed, see app/logging_config.py)
 logger = logging.getLogger(__name__)
 
 # Add the current directory to the Python path
@@ -37,13 +33,20 @@ def admin_set_random_puzzle():
 if os.environ.get('VERCEL_ENV') == 'production':
     app.debug = False
     logger.info("Running in Vercel production environment")
-    # Start the scheduler even in production
-    from app.cron import start_scheduler
-    start_scheduler()
 else:
     app.debug = True
     logger.info("Running in development environment")
-    # Start the scheduler in development environment
+
+from app.config import Config
+
+if Config.LEAN_BOOT:
+    # Serverless instances are short-lived and frozen between requests, so a
+    # midnight thread would not run reliably; rotate via the admin endpoint or the schedule table
+    logger.info("Lean boot: not starting the scheduler thread")
+elif Config.DEFER_SCHEDULER:
+    # Threads started in the gunicorn master would not survive the fork; post_worker_init starts it
+    logger.info("Preloaded app: workers start the scheduler after fork")
+else:
     from app.cron import start_scheduler
     start_scheduler()
 
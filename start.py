@@ -1,107 +1,346 @@
 #!/usr/bin/env python3
+"""
+Run the frontend (Next.js) and backend (Flask) dev servers together.
+
+All four stdout/stderr pipes are watched with a selector and printed as soon as
+data arrives, so a quiet stream never holds up the others and a chatty process
+never blocks on a full pipe. Windows can't select on pipes, so there each pipe
+gets a reader thread that hands its output to the main loop instead. A server
+that exits is restarted with exponential backoff. Every few seconds the CPU and
+RSS of each server (including its child processes) and of this supervisor are
+printed.
+
+Usage:
+    python start.py [--stats-interval SECONDS] [--no-restart]
+"""
+
+import argparse
 import os
+import queue
+import selectors
+import signal
 import subprocess
 import sys
+import threading
 import time
-import signal
-import atexit
-
-def run_command(command, cwd, env=None):
-    """Run a command in a specific directory"""
-    return subprocess.Popen(
-        command,
-        cwd=cwd,
-        env={**os.environ, **(env or {})},
-        shell=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        universal_newlines=True,
-    )
-
-def print_output(process, prefix):
-    """Print output from a process with a prefix"""
-    while True:
-        output = process.stdout.readline()
-        error = process.stderr.readline()
-        if output:
-            print(f"{prefix}: {output.strip()}")
-        if error:
-            print(f"{prefix} ERROR: {error.strip()}")
-        if process.poll() is not None:
-            # Print any remaining errors
-            for error in process.stderr.readlines():
-                print(f"{prefix} ERROR: {error.strip()}")
-            break
-
-def cleanup_processes(processes):
-    """Cleanup all running processes"""
-    for process in processes:
-        if process.poll() is None:  # If process is still running
-            process.terminate()
+
+# Restart delay doubles after each quick crash, up to BACKOFF_MAX seconds
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+# A server that ran this long before exiting is restarted without backoff
+STABLE_SECONDS = 30.0
+
+READ_SIZE = 65536
+
+class ManagedProcess:
+    """A dev server started in its own session, so it can be stopped together with its children"""
+
+    def __init__(self, name, command, cwd, env=None):
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.env = env or {}
+        self.process = None
+        self.started_at = 0.0
+        self.failures = 0
+        self.restart_at = None
+        self.last_usage = None
+
+    def start(self):
+        print(f"Starting {self.name.lower()} server...")
+        self.process = subprocess.Popen(
+            self.command,
+            cwd=self.cwd,
+            env={**os.environ, **self.env},
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=hasattr(os, "killpg"),
+        )
+        self.started_at = time.monotonic()
+        self.restart_at = None
+        self.last_usage = None
+        return self.process
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def schedule_restart(self):
+        """Pick when to restart after an exit, backing off while it keeps crashing"""
+        if time.monotonic() - self.started_at >= STABLE_SECONDS:
+            self.failures = 0
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** self.failures)
+        self.failures += 1
+        self.restart_at = time.monotonic() + delay
+        return delay
+
+    def stop(self, timeout=5):
+        """Terminate the server and its children, killing them if they don't exit in time"""
+        if not self.is_running():
+            return
+        self._signal(signal.SIGTERM)
+        try:
+            self.process.wait(timeout=timeout)  # Wait for graceful shutdown
+        except subprocess.TimeoutExpired:
+            self._signal(getattr(signal, "SIGKILL", signal.SIGTERM))
+            self.process.wait()
+
+    def _signal(self, sig):
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(self.process.pid, sig)
+            else:
+                self.process.send_signal(sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+def _proc_stat(pid):
+    """(session id, CPU seconds, RSS bytes) of one process from /proc"""
+    with open(f"/proc/{pid}/stat", "rb") as f:
+        # The command name may contain spaces, so split after its closing parenthesis
+        fields = f.read().rsplit(b")", 1)[1].split()
+    ticks = os.sysconf("SC_CLK_TCK")
+    return int(fields[3]), (int(fields[11]) + int(fields[12])) / ticks, int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+
+def process_usage(pid, session=False):
+    """
+    Return (CPU seconds, RSS bytes, process count) for pid, or for every process in
+    the session it leads when session is set. Uses psutil if installed, else /proc;
+    returns None when neither is available.
+    """
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + (root.children(recursive=True) if session else [])
+            cpu = rss = 0
+            for process in processes:
+                with process.oneshot():
+                    times = process.cpu_times()
+                    cpu += times.user + times.system
+                    rss += process.memory_info().rss
+            return cpu, rss, len(processes)
+        except psutil.Error:
+            return None
+
+    if not os.path.isdir("/proc"):
+        return None
+    if not session:
+        try:
+            _, cpu, rss = _proc_stat(pid)
+        except (OSError, ValueError, IndexError):
+            return None
+        return cpu, rss, 1
+
+    cpu = rss = count = 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            sid, seconds, resident = _proc_stat(entry)
+        except (OSError, ValueError, IndexError):
+            continue  # Exited while we were looking
+        if sid == pid:
+            cpu += seconds
+            rss += resident
+            count += 1
+    return (cpu, rss, count) if count else None
+
+def format_usage(name, usage, previous, now):
+    cpu, rss, count = usage
+    line = f"{name}: "
+    if previous is not None:
+        (previous_cpu, _, _), previous_time = previous
+        line += f"cpu {max(cpu - previous_cpu, 0) / max(now - previous_time, 1e-6) * 100:.1f}% "
+    line += f"rss {rss / 2**20:.1f} MB"
+    if count > 1:
+        line += f" ({count} processes)"
+    return line
+
+class Supervisor:
+    def __init__(self, servers, stats_interval=10.0, restart=True):
+        self.servers = servers
+        self.stats_interval = stats_interval
+        self.restart = restart
+        self.selector = selectors.DefaultSelector()
+        # Selectors only take sockets on Windows, so pipes are read by threads there
+        self.use_threads = os.name == "nt"
+        # (stream, label, data) from the reader threads; empty data means EOF
+        self.output = queue.Queue()
+        # Partial lines per pipe, printed once their newline arrives
+        self.buffers = {}
+        self.own_usage = None
+        self.next_stats = time.monotonic() + stats_interval
+
+    def start(self, server):
+        process = server.start()
+        for stream, label in ((process.stdout, server.name), (process.stderr, f"{server.name} ERROR")):
+            self.buffers[stream] = b""
+            if self.use_threads:
+                threading.Thread(target=self.pump, args=(stream, label), daemon=True).start()
+            else:
+                os.set_blocking(stream.fileno(), False)
+                self.selector.register(stream, selectors.EVENT_READ, label)
+
+    def pump(self, stream, label):
+        """Reader thread: pass the pipe's output to the main loop until EOF"""
+        while True:
+            data = stream.read1(READ_SIZE)
+            self.output.put((stream, label, data))
+            if not data:
+                return
+
+    def poll(self, timeout):
+        """Print the output that arrives within timeout"""
+        if not self.use_threads:
+            for key, _ in self.selector.select(timeout=timeout):
+                self.read(key.fileobj, key.data)
+            return
+        try:
+            item = self.output.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while True:
+            self.consume(*item)
             try:
-                process.wait(timeout=5)  # Wait up to 5 seconds for graceful shutdown
-            except subprocess.TimeoutExpired:
-                process.kill()  # Force kill if process doesn't terminate
+                item = self.output.get_nowait()
+            except queue.Empty:
+                return
+
+    def read(self, stream, label):
+        """Read what the non-blocking pipe has ready"""
+        try:
+            data = os.read(stream.fileno(), READ_SIZE)
+        except BlockingIOError:
+            return
+        self.consume(stream, label, data)
+
+    def consume(self, stream, label, data):
+        """Print whatever complete lines the pipe has; close it at EOF"""
+        buffer = self.buffers[stream] + data
+        if not data:
+            if not self.use_threads:
+                self.selector.unregister(stream)
+            stream.close()
+            del self.buffers[stream]
+            if buffer:
+                self.emit(label, buffer)
+            return
+
+        *lines, rest = buffer.split(b"\n")
+        for line in lines:
+            self.emit(label, line)
+        if len(rest) >= READ_SIZE:
+            # No newline in sight; don't let one huge line grow without bound
+            self.emit(label, rest)
+            rest = b""
+        self.buffers[stream] = rest
+
+    def emit(self, label, line):
+        print(f"{label}: {line.decode('utf-8', errors='replace').rstrip()}", flush=True)
+
+    def check_processes(self):
+        """Restart servers that have exited; return False when the supervisor should stop"""
+        now = time.monotonic()
+        for server in self.servers:
+            if server.restart_at is not None:
+                if now >= server.restart_at:
+                    self.start(server)
+                continue
+            if server.is_running():
+                continue
+
+            code = server.process.returncode
+            if not self.restart:
+                print(f"{server.name} server stopped unexpectedly (exit code {code})")
+                return False
+            delay = server.schedule_restart()
+            print(f"{server.name} server stopped unexpectedly (exit code {code}), restarting in {delay:.0f}s")
+        return True
+
+    def print_stats(self):
+        now = time.monotonic()
+        parts = []
+        for server in self.servers:
+            usage = process_usage(server.process.pid, session=True) if server.is_running() else None
+            if usage is None:
+                parts.append(f"{server.name}: not running")
+                continue
+            parts.append(format_usage(server.name, usage, server.last_usage, now))
+            server.last_usage = (usage, now)
+
+        usage = process_usage(os.getpid())
+        if usage is None:
+            print("Stats: install psutil (pip install psutil) for CPU and memory stats on this platform")
+            self.stats_interval = 0
+            return
+        parts.append(format_usage("Supervisor", usage, self.own_usage, now))
+        self.own_usage = (usage, now)
+        print(f"Stats | {' | '.join(parts)}", flush=True)
+
+    def run(self):
+        for server in self.servers:
+            self.start(server)
+
+        while True:
+            # Wake up at least twice a second for exits, restarts and stats
+            self.poll(0.5)
+
+            if not self.check_processes():
+                return
+            if self.stats_interval and time.monotonic() >= self.next_stats:
+                self.print_stats()
+                self.next_stats = time.monotonic() + self.stats_interval
+
+    def stop(self):
+        for server in self.servers:
+            server.stop()
+        # Print what was still in the pipes, without waiting on children that outlived the signal
+        deadline = time.monotonic() + 1
+        while self.buffers and time.monotonic() < deadline:
+            self.poll(0.1)
 
 def main():
+    parser = argparse.ArgumentParser(description='Run the Connectle frontend and backend dev servers')
+    parser.add_argument('--stats-interval', type=float, default=10.0,
+                        help='Seconds between CPU/RSS reports, 0 to disable (default: 10)')
+    parser.add_argument('--no-restart', action='store_true',
+                        help='Stop everything when a server exits instead of restarting it')
+    args = parser.parse_args()
+
     # Get the root directory
     root_dir = os.path.dirname(os.path.abspath(__file__))
     frontend_dir = os.path.join(root_dir, 'frontend')
     api_dir = os.path.join(root_dir, 'api')
-    
-    # Start frontend (Next.js)
-    print("Starting frontend server...")
-    frontend = run_command('npm run dev', frontend_dir)
-    
-    # Start backend (Flask)
-    print("Starting backend server...")
-    backend = run_command(
-        'python3 wsgi.py',
-        api_dir,
-        env={
-            'FLASK_APP': 'wsgi.py',
-            'FLASK_DEBUG': '1',
-            'PYTHONPATH': api_dir,
-            'FLASK_ENV': 'development'
-        }
-    )
-    
-    # Register cleanup function
-    processes = [frontend, backend]
-    atexit.register(cleanup_processes, processes)
-    
+
+    servers = [
+        ManagedProcess("Frontend", 'npm run dev', frontend_dir),
+        ManagedProcess(
+            "Backend",
+            'python3 wsgi.py',
+            api_dir,
+            env={
+                'FLASK_APP': 'wsgi.py',
+                'FLASK_DEBUG': '1',
+                'PYTHONPATH': api_dir,
+                'FLASK_ENV': 'development',
+                # Write logs as they happen instead of in 8 KB blocks
+                'PYTHONUNBUFFERED': '1',
+            },
+        ),
+    ]
+    supervisor = Supervisor(servers, stats_interval=args.stats_interval, restart=not args.no_restart)
+
     try:
-        # Monitor both processes
-        while True:
-            # Check if either process has terminated
-            if frontend.poll() is not None:
-                print("Frontend server stopped unexpectedly")
-                break
-            if backend.poll() is not None:
-                print("Backend server stopped unexpectedly")
-                break
-                
-            # Print output from both processes
-            frontend_output = frontend.stdout.readline()
-            frontend_error = frontend.stderr.readline()
-            if frontend_output:
-                print(f"Frontend: {frontend_output.strip()}")
-            if frontend_error:
-                print(f"Frontend ERROR: {frontend_error.strip()}")
-                
-            backend_output = backend.stdout.readline()
-            backend_error = backend.stderr.readline()
-            if backend_output:
-                print(f"Backend: {backend_output.strip()}")
-            if backend_error:
-                print(f"Backend ERROR: {backend_error.strip()}")
-            
-            time.sleep(0.1)  # Small delay to prevent CPU hogging
-            
+        supervisor.run()
     except KeyboardInterrupt:
         print("\nShutting down servers...")
     finally:
-        cleanup_processes(processes)
+        supervisor.stop()
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
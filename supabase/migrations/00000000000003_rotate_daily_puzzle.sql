@@ -0,0 +1,37 @@
+-- Rotate the daily puzzle in a single transaction so readers never see
+-- zero or two daily rows, and the API can do it in one round trip.
+create or replace function rotate_daily_puzzle(candidate_limit int default 100)
+returns setof puzzles
+language plpgsql
+as $$
+declare
+    selected_id uuid;
+begin
+    -- Serialize concurrent rotations (e.g. several schedulers firing at midnight)
+    perform pg_advisory_xact_lock(hashtext('rotate_daily_puzzle'));
+
+    -- Pick a random puzzle among the most recent ones, excluding the current daily
+    select candidates.id into selected_id
+    from (
+        select id from puzzles
+        where not coalesce(is_daily, false)
+        order by created_at desc
+        limit candidate_limit
+    ) candidates
+    order by random()
+    limit 1;
+
+    if selected_id is null then
+        return;
+    end if;
+
+    -- Clear the old flag and set the new one in the same statement
+    update puzzles
+    set is_daily = (id = selected_id)
+    where is_daily or id = selected_id;
+
+    return query select * from puzzles where id = selected_id;
+end;
+$$;
+
+grant execute on function rotate_daily_puzzle(int) to service_role;
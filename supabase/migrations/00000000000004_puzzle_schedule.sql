@@ -0,0 +1,21 @@
+-- Calendar of daily puzzles, filled ahead of time by
+-- `word_pair_generator.py --schedule-days N`. The primary key on date
+-- makes "today's puzzle" an indexed point lookup instead of a scan for
+-- the row flagged is_daily.
+create table if not exists puzzle_schedule (
+    date date primary key,
+    puzzle_id uuid not null references puzzles(id) on delete cascade,
+    created_at timestamp with time zone default now()
+);
+
+create index if not exists puzzle_schedule_puzzle_id_idx on puzzle_schedule(puzzle_id);
+
+-- Read-only for clients, and only up to today so upcoming puzzles aren't
+-- spoiled. There are no insert/update/delete policies: the calendar is
+-- written with the service role key, which bypasses RLS.
+alter table puzzle_schedule enable row level security;
+
+create policy "Anyone can read past and current schedule"
+    on puzzle_schedule for select
+    to anon, authenticated
+    using (date <= current_date);
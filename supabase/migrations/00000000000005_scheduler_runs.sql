@@ -0,0 +1,30 @@
+-- One row per scheduled job per day. Scheduler instances race to insert
+-- the row; only the one that inserts it runs the job, so N workers or
+-- serverless instances still rotate the daily puzzle exactly once.
+create table if not exists scheduler_runs (
+    job text not null,
+    run_date date not null,
+    claimed_at timestamp with time zone default now(),
+    primary key (job, run_date)
+);
+
+-- Service role only: with no policies, anon and authenticated can neither
+-- pre-claim a day nor delete claims. The service role bypasses RLS.
+alter table scheduler_runs enable row level security;
+revoke all on table scheduler_runs from anon, authenticated;
+
+create or replace function claim_scheduler_run(job_name text, run_date date)
+returns boolean
+language sql
+as $$
+    with claimed as (
+        insert into scheduler_runs (job, run_date)
+        values (job_name, run_date)
+        on conflict do nothing
+        returning 1
+    )
+    select exists (select 1 from claimed);
+$$;
+
+revoke execute on function claim_scheduler_run(text, date) from public, anon, authenticated;
+grant execute on function claim_scheduler_run(text, date) to service_role;
@@ -0,0 +1,104 @@
+-- Batched game results from the API's write-behind buffer. Each call
+-- upserts one pre-aggregated row per (puzzle, user) and applies a single
+-- delta per puzzle to puzzle_stats, instead of the per-row trigger
+-- updating the same puzzle_stats row once for every result.
+
+-- The per-row trigger still serves direct writes, but steps aside for batches
+create or replace function update_puzzle_stats()
+returns trigger as $$
+begin
+    if current_setting('connectle.batched_stats', true) = 'on' then
+        return NEW;
+    end if;
+
+    insert into puzzle_stats (puzzle_id, total_attempts, total_completions, total_hints_used, avg_chain_length, min_chain_length)
+    values (
+        NEW.puzzle_id,
+        1,
+        case when NEW.completed then 1 else 0 end,
+        NEW.hints_used,
+        NEW.best_chain_length,
+        NEW.best_chain_length
+    )
+    on conflict (puzzle_id) do update set
+        total_attempts = puzzle_stats.total_attempts + 1,
+        total_completions = puzzle_stats.total_completions + case when NEW.completed then 1 else 0 end,
+        total_hints_used = puzzle_stats.total_hints_used + NEW.hints_used,
+        avg_chain_length = (puzzle_stats.avg_chain_length * puzzle_stats.total_completions + NEW.best_chain_length) / (puzzle_stats.total_completions + 1),
+        min_chain_length = least(puzzle_stats.min_chain_length, NEW.best_chain_length),
+        updated_at = now();
+    return NEW;
+end;
+$$ language plpgsql;
+
+-- results: [{puzzle_id, user_id, attempts, completions, hints_used, best_chain_length, chain_total}]
+-- with at most one entry per (puzzle_id, user_id). Entries for unknown puzzles or users are skipped.
+create or replace function record_puzzle_results(results jsonb)
+returns void
+language plpgsql
+as $$
+begin
+    perform set_config('connectle.batched_stats', 'on', true);
+
+    with batch as (
+        select r.*
+        from jsonb_to_recordset(results) as r(
+            puzzle_id uuid, user_id uuid, attempts int, completions int,
+            hints_used int, best_chain_length int, chain_total int
+        )
+        where exists (select 1 from puzzles p where p.id = r.puzzle_id)
+          and exists (select 1 from auth.users u where u.id = r.user_id)
+    ),
+    upserted as (
+        insert into user_puzzle_stats as s (
+            puzzle_id, user_id, best_chain_length, hints_used, attempts_count, completed, first_completed_at
+        )
+        -- Consistent row order so concurrent batches from several workers cannot deadlock
+        select puzzle_id, user_id, best_chain_length, hints_used, attempts,
+               completions > 0, case when completions > 0 then now() end
+        from batch
+        order by puzzle_id, user_id
+        on conflict (puzzle_id, user_id) do update set
+            best_chain_length = least(s.best_chain_length, excluded.best_chain_length),
+            hints_used = s.hints_used + excluded.hints_used,
+            attempts_count = s.attempts_count + excluded.attempts_count,
+            completed = s.completed or excluded.completed,
+            first_completed_at = coalesce(s.first_completed_at, excluded.first_completed_at),
+            updated_at = now()
+        returning 1
+    ),
+    deltas as (
+        select puzzle_id,
+               sum(attempts)::int as attempts,
+               sum(completions)::int as completions,
+               sum(hints_used)::int as hints_used,
+               sum(chain_total) as chain_total,
+               min(best_chain_length) as min_chain_length
+        from batch
+        group by puzzle_id
+    )
+    insert into puzzle_stats as ps (
+        puzzle_id, total_attempts, total_completions, total_hints_used, avg_chain_length, min_chain_length
+    )
+    select puzzle_id, attempts, completions, hints_used,
+           case when completions > 0 then chain_total::float / completions end,
+           min_chain_length
+    from deltas
+    order by puzzle_id
+    on conflict (puzzle_id) do update set
+        total_attempts = ps.total_attempts + excluded.total_attempts,
+        total_completions = ps.total_completions + excluded.total_completions,
+        total_hints_used = ps.total_hints_used + excluded.total_hints_used,
+        avg_chain_length = case
+            when excluded.total_completions > 0 then
+                (coalesce(ps.avg_chain_length, 0) * ps.total_completions
+                 + excluded.avg_chain_length * excluded.total_completions)
+                / (ps.total_completions + excluded.total_completions)
+            else ps.avg_chain_length
+        end,
+        min_chain_length = least(ps.min_chain_length, excluded.min_chain_length),
+        updated_at = now();
+end;
+$$;
+
+grant execute on function record_puzzle_results(jsonb) to service_role;
@@ -0,0 +1,34 @@
+-- Per-puzzle histograms of chain length and hints used over completed games,
+-- for "how did I do compared to everyone". One row per (puzzle, metric,
+-- value); the API caps values so each puzzle has a few dozen rows at most.
+create table if not exists puzzle_distributions (
+    puzzle_id uuid references puzzles(id) on delete cascade,
+    metric text not null check (metric in ('chain_length', 'hints_used')),
+    value int not null,
+    count int not null default 0,
+    primary key (puzzle_id, metric, value)
+);
+
+alter table puzzle_distributions enable row level security;
+
+create policy "Anyone can read puzzle distributions"
+    on puzzle_distributions for select
+    to authenticated
+    using (true);
+
+-- counts: [{puzzle_id, metric, value, count}] with at most one entry per key,
+-- pre-aggregated by the API's write-behind buffer. Unknown puzzles are skipped.
+create or replace function record_puzzle_distributions(counts jsonb)
+returns void
+language sql
+as $$
+    insert into puzzle_distributions as d (puzzle_id, metric, value, count)
+    select c.puzzle_id, c.metric, c.value, c.count
+    from jsonb_to_recordset(counts) as c(puzzle_id uuid, metric text, value int, count int)
+    where exists (select 1 from puzzles p where p.id = c.puzzle_id)
+    order by c.puzzle_id, c.metric, c.value
+    on conflict (puzzle_id, metric, value) do update set
+        count = d.count + excluded.count;
+$$;
+
+grant execute on function record_puzzle_distributions(jsonb) to service_role;
@@ -0,0 +1,5 @@
+-- Keyset pagination over puzzles newest first: "order by created_at desc, id desc"
+-- with a (created_at, id) < (cursor) condition is an index range scan, so any
+-- archive page costs the same no matter how deep it is. The rotation's
+-- "order by created_at desc limit N" uses the same index.
+create index if not exists puzzles_created_at_id_idx on puzzles(created_at desc, id desc);
@@ -0,0 +1,109 @@
+-- Histograms count each player once per puzzle: the chain length and hints of
+-- their first completed game. The counts are now added by record_puzzle_results
+-- itself, for exactly the (puzzle, user) rows this batch marks completed for the
+-- first time, so re-submissions no longer inflate them.
+--
+-- Both functions stay service_role only: SUPABASE_KEY on the API must be the
+-- service role key. Histograms are public aggregates and readable with any key.
+
+drop function if exists record_puzzle_distributions(jsonb);
+
+create policy "Anyone can read puzzle distributions (anon)"
+    on puzzle_distributions for select
+    to anon
+    using (true);
+
+-- results: [{puzzle_id, user_id, attempts, completions, hints_used, best_chain_length, chain_total,
+--            chain_length_bucket, hints_used_bucket}] with at most one entry per (puzzle_id, user_id).
+-- The buckets are those of the first completed game in the entry, null if none completed.
+-- Entries for unknown puzzles or users are skipped.
+create or replace function record_puzzle_results(results jsonb)
+returns void
+language plpgsql
+as $$
+begin
+    perform set_config('connectle.batched_stats', 'on', true);
+
+    with batch as (
+        select r.*
+        from jsonb_to_recordset(results) as r(
+            puzzle_id uuid, user_id uuid, attempts int, completions int,
+            hints_used int, best_chain_length int, chain_total int,
+            chain_length_bucket int, hints_used_bucket int
+        )
+        where exists (select 1 from puzzles p where p.id = r.puzzle_id)
+          and exists (select 1 from auth.users u where u.id = r.user_id)
+    ),
+    upserted as (
+        insert into user_puzzle_stats as s (
+            puzzle_id, user_id, best_chain_length, hints_used, attempts_count, completed, first_completed_at
+        )
+        -- Consistent row order so concurrent batches from several workers cannot deadlock
+        select puzzle_id, user_id, best_chain_length, hints_used, attempts,
+               completions > 0, case when completions > 0 then now() end
+        from batch
+        order by puzzle_id, user_id
+        on conflict (puzzle_id, user_id) do update set
+            best_chain_length = least(s.best_chain_length, excluded.best_chain_length),
+            hints_used = s.hints_used + excluded.hints_used,
+            attempts_count = s.attempts_count + excluded.attempts_count,
+            completed = s.completed or excluded.completed,
+            first_completed_at = coalesce(s.first_completed_at, excluded.first_completed_at),
+            updated_at = now()
+        -- first_completed_at only equals this transaction's now() when this call set it. The
+        -- conflict update sees the latest committed row, so concurrent batches can't both claim it.
+        returning s.puzzle_id, s.user_id, s.first_completed_at = now() as first_completion
+    ),
+    first_completions as (
+        select b.puzzle_id, b.chain_length_bucket, b.hints_used_bucket
+        from batch b
+        join upserted u on u.puzzle_id = b.puzzle_id and u.user_id = b.user_id
+        where u.first_completion and b.chain_length_bucket is not null
+    ),
+    histogram as (
+        insert into puzzle_distributions as d (puzzle_id, metric, value, count)
+        select puzzle_id, metric, value, count(*)::int
+        from first_completions,
+             lateral (values ('chain_length', chain_length_bucket),
+                             ('hints_used', hints_used_bucket)) as m(metric, value)
+        group by puzzle_id, metric, value
+        order by puzzle_id, metric, value
+        on conflict (puzzle_id, metric, value) do update set
+            count = d.count + excluded.count
+        returning 1
+    ),
+    deltas as (
+        select puzzle_id,
+               sum(attempts)::int as attempts,
+               sum(completions)::int as completions,
+               sum(hints_used)::int as hints_used,
+               sum(chain_total) as chain_total,
+               min(best_chain_length) as min_chain_length
+        from batch
+        group by puzzle_id
+    )
+    insert into puzzle_stats as ps (
+        puzzle_id, total_attempts, total_completions, total_hints_used, avg_chain_length, min_chain_length
+    )
+    select puzzle_id, attempts, completions, hints_used,
+           case when completions > 0 then chain_total::float / completions end,
+           min_chain_length
+    from deltas
+    order by puzzle_id
+    on conflict (puzzle_id) do update set
+        total_attempts = ps.total_attempts + excluded.total_attempts,
+        total_completions = ps.total_completions + excluded.total_completions,
+        total_hints_used = ps.total_hints_used + excluded.total_hints_used,
+        avg_chain_length = case
+            when excluded.total_completions > 0 then
+                (coalesce(ps.avg_chain_length, 0) * ps.total_completions
+                 + excluded.avg_chain_length * excluded.total_completions)
+                / (ps.total_completions + excluded.total_completions)
+            else ps.avg_chain_length
+        end,
+        min_chain_length = least(ps.min_chain_length, excluded.min_chain_length),
+        updated_at = now();
+end;
+$$;
+
+grant execute on function record_puzzle_results(jsonb) to service_role;